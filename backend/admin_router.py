@@ -5,23 +5,51 @@ Provides all admin APIs for event management, room control, and exports
 
 import os
 import csv
-import json
+import asyncio
+import logging
+import heapq
 import uuid
+import random
+import orjson
+import segno
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import List, Optional, Dict, Any
-from io import StringIO
+from io import StringIO, BytesIO
+from urllib.parse import quote
 from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse, ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, desc, delete
+from sqlalchemy import select, update, func, desc, delete, case, null
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import selectinload
 from pydantic import BaseModel
 
-from database import get_db
+from database import get_db, async_session
 from models import Team, Session, Story, Turn, SessionAnalysis, SessionStatus, StoryStatus
+from leaderboard import refresh_team_leaderboard
+from teams import CachedTeam, cache_team, get_team_by_code
 from admin_security import verify_admin, AdminUser, log_admin_action, add_admin_headers
+from cache import (
+    cache_get, cache_set, cache_delete,
+    SNAPSHOT_CACHE_KEY, DASHBOARD_CACHE_KEY, ADMIN_VIEW_TTL_SECONDS,
+    live_events_enabled, publish_team_event, subscribe_team_events, evict_analyses
+)
+
+logger = logging.getLogger(__name__)
 
 # Initialize router
-router = APIRouter(prefix="/api/v1/admin", tags=["admin"])
+router = APIRouter(prefix="/api/v1/admin", tags=["admin"], default_response_class=ORJSONResponse)
+
+# Opening lines used when an admin starts a room
+_STARTER_PROMPTS = (
+    "In a world where dreams become reality, a young inventor discovers...",
+    "The last library on Earth holds a secret that could change everything...",
+    "When the clocktower struck thirteen, something extraordinary happened...",
+    "Deep in the enchanted forest, an ancient magic awakens...",
+    "The mysterious package arrived exactly at midnight, containing..."
+)
 
 # Pydantic models for admin APIs
 class BootstrapRequest(BaseModel):
@@ -64,16 +92,69 @@ class SnapshotResponse(BaseModel):
     total_stories: int
     total_turns: int
 
+# Frontend base URL is fixed for the lifetime of the process
+FRONTEND_URL = os.getenv('FRONTEND_URL', 'http://localhost:3000')
+
+# Matches the length of the Team.code column
+TEAM_CODE_MAX_LENGTH = 50
+
+@lru_cache(maxsize=4096)
 def generate_join_url(team_code: str) -> str:
     """Generate join URL for team"""
-    base_url = os.getenv('FRONTEND_URL', 'http://localhost:3000')
-    return f"{base_url}/?team={team_code}&mode=event"
+    return f"{FRONTEND_URL}/?team={team_code}&mode=event"
 
+@lru_cache(maxsize=4096)
 def generate_qr_code_url(team_code: str) -> str:
-    """Generate QR code URL for team join"""
-    join_url = generate_join_url(team_code)
-    # Using a simple QR code service - in production, you might want to use your own
-    return f"https://api.qrserver.com/v1/create-qr-code/?size=200x200&data={join_url}"
+    """Generate QR code URL for team join (served by this API, see get_qr_code)"""
+    return f"{router.prefix}/qr/{quote(team_code, safe='')}.png"
+
+@lru_cache(maxsize=1024)
+def render_qr_png(team_code: str) -> bytes:
+    """Render the team join QR code as PNG bytes"""
+    buffer = BytesIO()
+    segno.make(generate_join_url(team_code), error='M').save(buffer, kind='png', scale=4)
+    return buffer.getvalue()
+
+# Groq client is created once and reused so its connection pool survives
+# across twist requests
+_groq_client = None
+
+def get_groq_client():
+    """Return the shared async Groq client, or None when no API key is configured"""
+    global _groq_client
+    if _groq_client is None:
+        groq_api_key = os.getenv('GROQ_API_KEY')
+        if groq_api_key:
+            from groq import AsyncGroq
+            _groq_client = AsyncGroq(api_key=groq_api_key)
+    return _groq_client
+
+def sql_utcnow():
+    """Database-side UTC timestamp, so stored times don't depend on the app server clock"""
+    return func.timezone('utc', func.now())
+
+async def invalidate_admin_views():
+    """Drop cached snapshot/dashboard responses after a room changes"""
+    await cache_delete(SNAPSHOT_CACHE_KEY, DASHBOARD_CACHE_KEY)
+
+@router.get("/qr/{team_code}.png")
+async def get_qr_code(team_code: str, db: AsyncSession = Depends(get_db)):
+    """Serve the join QR code for a team.
+    
+    Not behind verify_admin: it is loaded via <img> tags, which can't send admin
+    headers, and it only encodes the public join URL. Only existing team codes
+    are rendered, so arbitrary input can't overflow the QR encoder.
+    """
+    if len(team_code) > TEAM_CODE_MAX_LENGTH:
+        raise HTTPException(status_code=400, detail="Invalid team code")
+    if await get_team_by_code(db, team_code) is None:
+        raise HTTPException(status_code=404, detail="Team not found")
+    
+    return Response(
+        content=render_qr_png(team_code),
+        media_type="image/png",
+        headers={"Cache-Control": "public, max-age=86400"}
+    )
 
 @router.post("/event/bootstrap", response_model=BootstrapResponse)
 async def bootstrap_event(
@@ -84,52 +165,69 @@ async def bootstrap_event(
 ):
     """Bootstrap event with multiple teams"""
     
-    teams_created = []
-    
+    # Normalize friendly codes, keeping the first display name for each code
+    team_names = {}
     for team_name in bootstrap_data.team_codes:
-        # Create team with friendly code
         team_code = team_name.lower().replace(' ', '_').replace('-', '_')
+        team_names.setdefault(team_code, team_name)
+    codes = list(team_names)
+    
+    teams_created = []
+    
+    if codes:
+        now = datetime.utcnow()
         
-        # Check if team already exists
-        existing_team = await db.execute(
-            select(Team).where(Team.code == team_code)
+        # Create missing teams in one statement; existing codes are left untouched
+        await db.execute(
+            pg_insert(Team)
+            .values([
+                {'id': uuid.uuid4(), 'code': code, 'name': f"Team {name.title()}", 'created_at': now}
+                for code, name in team_names.items()
+            ])
+            .on_conflict_do_nothing(index_elements=['code'])
         )
-        team = existing_team.scalar_one_or_none()
         
-        if not team:
-            # Create new team
-            team = Team(
-                code=team_code,
-                name=f"Team {team_name.title()}"
-            )
-            db.add(team)
-            await db.flush()  # Get the ID
+        # Fetch ids for every requested team in one round-trip
+        team_rows = await db.execute(
+            select(Team.code, Team.id, Team.name, Team.created_at).where(Team.code.in_(codes))
+        )
+        team_ids = {}
+        for code, team_id, name, created_at in team_rows.all():
+            team_ids[code] = team_id
+            cache_team(code, CachedTeam(team_id, name, created_at))
         
-        # Create or get active session
-        existing_session = await db.execute(
-            select(Session).where(
-                Session.team_id == team.id,
+        # Find teams that already have an active session
+        session_rows = await db.execute(
+            select(Session.team_id, Session.id).where(
+                Session.team_id.in_(team_ids.values()),
                 Session.status == SessionStatus.ACTIVE
             )
         )
-        session = existing_session.scalar_one_or_none()
+        session_ids = dict(session_rows.all())
         
-        if not session:
-            session = Session(
-                team_id=team.id,
-                status=SessionStatus.ACTIVE
+        # Create sessions for the rest in one bulk insert
+        missing_team_ids = [team_id for team_id in team_ids.values() if team_id not in session_ids]
+        if missing_team_ids:
+            new_sessions = await db.execute(
+                pg_insert(Session)
+                .values([
+                    {'id': uuid.uuid4(), 'team_id': team_id, 'status': SessionStatus.ACTIVE, 'started_at': now}
+                    for team_id in missing_team_ids
+                ])
+                .returning(Session.team_id, Session.id)
             )
-            db.add(session)
-            await db.flush()
+            session_ids.update(new_sessions.all())
         
-        teams_created.append(TeamResponse(
-            team_code=team_code,
-            session_id=str(session.id),
-            join_url=generate_join_url(team_code),
-            qr_code_url=generate_qr_code_url(team_code)
-        ))
+        for team_code in codes:
+            teams_created.append(TeamResponse(
+                team_code=team_code,
+                session_id=str(session_ids[team_ids[team_code]]),
+                join_url=generate_join_url(team_code),
+                qr_code_url=generate_qr_code_url(team_code)
+            ))
     
     await db.commit()
+    await invalidate_admin_views()
     
     # Log admin action
     await log_admin_action(
@@ -154,27 +252,28 @@ async def create_room(
     team_name = room_data.team_name or room_data.team_code.title()
     
     # Check if team already exists
-    existing_team = await db.execute(
-        select(Team).where(Team.code == team_code)
-    )
-    team = existing_team.scalar_one_or_none()
-    
-    if not team:
-        team = Team(
+    team = await get_team_by_code(db, team_code)
+    
+    # Ids are assigned client-side so team and session go out in a single flush
+    if team is not None:
+        team_id = team.id
+    else:
+        team_id = uuid.uuid4()
+        db.add(Team(
+            id=team_id,
             code=team_code,
             name=f"Team {team_name}"
-        )
-        db.add(team)
-        await db.flush()
+        ))
     
     # Create session
     session = Session(
-        team_id=team.id,
+        id=uuid.uuid4(),
+        team_id=team_id,
         status=SessionStatus.ACTIVE
     )
     db.add(session)
-    await db.flush()
     await db.commit()
+    await invalidate_admin_views()
     
     # Log admin action
     await log_admin_action(
@@ -198,63 +297,100 @@ async def get_snapshot(
 ):
     """Get snapshot of all rooms/teams"""
     
-    # Get all active sessions with teams and stories
+    # Serve from the short-lived cache while the dashboard is polling
+    cached = await cache_get(SNAPSHOT_CACHE_KEY)
+    if cached:
+        return Response(content=cached, media_type="application/json")
+    
+    # Get all active sessions with their team and active stories in one
+    # query plus IN-batches, instead of one story query per team
     result = await db.execute(
-        select(Session, Team)
-        .join(Team, Session.team_id == Team.id)
+        select(Session)
+        .join(Session.team)
         .where(Session.status == SessionStatus.ACTIVE)
-        .options(selectinload(Session.team))
+        .options(
+            selectinload(Session.team)
+            .selectinload(Team.stories.and_(Story.status == StoryStatus.ACTIVE))
+        )
     )
+
+    sessions = result.scalars().all()
     
-    sessions_teams = result.all()
-    teams_snapshot = []
-    
-    for session, team in sessions_teams:
-        # Get active story for this team
-        story_result = await db.execute(
-            select(Story).where(
-                Story.team_id == team.id,
-                Story.status == StoryStatus.ACTIVE
+    # Most recent active story for each team
+    latest_stories = {
+        session.id: max(session.team.stories, key=lambda s: s.created_at, default=None)
+        for session in sessions
+    }
+    story_ids = [story.id for story in latest_stories.values() if story]
+    
+    # Turn counts, twist counts and distinct authors per story are aggregated in
+    # SQL, and only the last two turns of each story are fetched
+    turn_stats = {}
+    recent_turns = {}
+    if story_ids:
+        stats_rows = await db.execute(
+            select(
+                Turn.story_id,
+                func.count(Turn.id),
+                func.count(Turn.id).filter(Turn.is_twist.is_(True)),
+                func.count(func.distinct(Turn.author_name)).filter(Turn.is_twist.is_not(True))
             )
-            .options(selectinload(Story.turns))
-            .order_by(Story.created_at.desc())
+            .where(Turn.story_id.in_(story_ids))
+            .group_by(Turn.story_id)
         )
-        story = story_result.scalars().first()
+        turn_stats = {story_id: (turns, twists, authors) for story_id, turns, twists, authors in stats_rows}
         
+        ranked_turns = (
+            select(
+                Turn.story_id, Turn.author_name, Turn.is_twist, Turn.content,
+                func.row_number().over(partition_by=Turn.story_id, order_by=Turn.turn_number.desc()).label('recency')
+            )
+            .where(Turn.story_id.in_(story_ids))
+            .subquery()
+        )
+        recent_rows = await db.execute(
+            select(ranked_turns.c.story_id, ranked_turns.c.author_name, ranked_turns.c.is_twist, ranked_turns.c.content)
+            .where(ranked_turns.c.recency <= 2)
+            .order_by(ranked_turns.c.story_id, ranked_turns.c.recency.desc())
+        )
+        for story_id, author_name, is_twist, content in recent_rows:
+            recent_turns.setdefault(story_id, []).append((author_name, is_twist, content))
+    
+    teams_snapshot = []
+    now = datetime.utcnow()
+
+    for session in sessions:
+        team = session.team
+        story = latest_stories[session.id]
+
         # Calculate time remaining
         time_remaining_seconds = 0
         if story and hasattr(story, 'started_at') and story.started_at:
             duration_minutes = 10  # Default duration
             end_time = story.started_at + timedelta(minutes=duration_minutes)
-            time_remaining_seconds = max(0, int((end_time - datetime.utcnow()).total_seconds()))
+            time_remaining_seconds = max(0, int((end_time - now).total_seconds()))
         
-        # Get last two messages
+        # Get last two messages, twist count and member estimate
         last_messages = []
         twist_count = 0
-        if story and story.turns:
-            # Sort turns by turn_number descending and take last 2
-            sorted_turns = sorted(story.turns, key=lambda t: t.turn_number, reverse=True)[:2]
-            for turn in reversed(sorted_turns):  # Reverse to show chronological order
+        members_count = 1  # Default assumption
+        turn_count = 0
+        if story and story.id in turn_stats:
+            turn_count, twist_count, members_count = turn_stats[story.id]
+            
+            for author_name, is_twist, content in recent_turns.get(story.id, []):
                 last_messages.append({
-                    'author': turn.author_name,
-                    'is_twist': turn.is_twist,
-                    'content': turn.content[:100] + '...' if len(turn.content) > 100 else turn.content
+                    'author': author_name,
+                    'is_twist': is_twist,
+                    'content': content[:100] + '...' if len(content) > 100 else content
                 })
-            
-            twist_count = sum(1 for turn in story.turns if turn.is_twist)
-        
-        # Estimate member count (simplified)
-        members_count = 1  # Default assumption
-        if story and story.turns:
-            unique_authors = set(turn.author_name for turn in story.turns if not turn.is_twist)
-            members_count = len(unique_authors)
         
         # Determine status
         status = "waiting"
         if story:
             if time_remaining_seconds <= 0:
                 status = "completed"
-            elif story.turns and len(story.turns) > 1:
+            elif turn_count > 1:
                 status = "active"
         
         teams_snapshot.append(TeamSnapshot(
@@ -275,14 +411,17 @@ async def get_snapshot(
     active_sessions = sum(1 for team in teams_snapshot if team.status == "active")
     completed_sessions = sum(1 for team in teams_snapshot if team.status == "completed")
     
-    # Get total stories and turns from database
-    total_stories_result = await db.execute(select(func.count(Story.id)))
-    total_stories = total_stories_result.scalar() or 0
-    
-    total_turns_result = await db.execute(select(func.count(Turn.id)))
-    total_turns = total_turns_result.scalar() or 0
-    
-    return SnapshotResponse(
+    # Get total stories and turns from database in a single round-trip
+    totals = (await db.execute(
+        select(
+            select(func.count()).select_from(Story).scalar_subquery().label("stories"),
+            select(func.sum(Story.total_turns)).scalar_subquery().label("turns")
+        )
+    )).one()
+    total_stories = totals.stories or 0
+    total_turns = totals.turns or 0
+
+    response_data = SnapshotResponse(
         teams=teams_snapshot,
         total_teams=total_teams,
         active_sessions=active_sessions,
@@ -290,6 +429,10 @@ async def get_snapshot(
         total_stories=total_stories,
         total_turns=total_turns
     )
+    
+    content = response_data.model_dump_json()
+    await cache_set(SNAPSHOT_CACHE_KEY, content, ADMIN_VIEW_TTL_SECONDS)
+    return Response(content=content, media_type="application/json")
 
 @router.post("/rooms/{team_code}/start")
 async def start_room(
@@ -301,17 +444,15 @@ async def start_room(
     """Start a room/session"""
     
     # Get team
-    team_result = await db.execute(
-        select(Team).where(Team.code == team_code)
-    )
-    team = team_result.scalar_one_or_none()
-    if not team:
+    team = await get_team_by_code(db, team_code)
+    if team is None:
         raise HTTPException(status_code=404, detail="Team not found")
+    team_id = team.id
     
     # Check if there's already an active story
     story_result = await db.execute(
         select(Story).where(
-            Story.team_id == team.id,
+            Story.team_id == team_id,
             Story.status == StoryStatus.ACTIVE
         )
     )
@@ -321,24 +462,16 @@ async def start_room(
         return {"message": "Story already active", "story_id": str(existing_story.id)}
     
     # Create new story with starter prompt
-    starter_prompts = [
-        "In a world where dreams become reality, a young inventor discovers...",
-        "The last library on Earth holds a secret that could change everything...",
-        "When the clocktower struck thirteen, something extraordinary happened...",
-        "Deep in the enchanted forest, an ancient magic awakens...",
-        "The mysterious package arrived exactly at midnight, containing..."
-    ]
-    
-    import random
-    initial_prompt = random.choice(starter_prompts)
+    initial_prompt = random.choice(_STARTER_PROMPTS)
     
     story = Story(
-        team_id=team.id,
+        team_id=team_id,
         title=f"{team.name} Adventure",
         initial_prompt=initial_prompt,
         current_turn=1,
+        total_turns=1,
         status=StoryStatus.ACTIVE,
-        started_at=datetime.utcnow()
+        started_at=sql_utcnow()
     )
     db.add(story)
     await db.flush()
@@ -353,6 +486,8 @@ async def start_room(
     )
     db.add(initial_turn)
     await db.commit()
+    await invalidate_admin_views()
+    await publish_team_event(team_id, 'story_started', story_id=story.id)
     
     # Log admin action
     await log_admin_action(
@@ -374,46 +509,46 @@ async def inject_twist(
     """Inject a twist into the story"""
     
     # Get team and active story
-    team_result = await db.execute(
-        select(Team).where(Team.code == team_code)
-    )
-    team = team_result.scalar_one_or_none()
-    if not team:
+    team = await get_team_by_code(db, team_code)
+    if team is None:
         raise HTTPException(status_code=404, detail="Team not found")
+    team_id = team.id
     
     story_result = await db.execute(
         select(Story)
         .where(
-            Story.team_id == team.id,
+            Story.team_id == team_id,
             Story.status == StoryStatus.ACTIVE
         )
-        .options(selectinload(Story.turns))
     )
     story = story_result.scalar_one_or_none()
     if not story:
         raise HTTPException(status_code=404, detail="No active story found")
     
     # Get last 3 turns for context
-    recent_turns = sorted(story.turns, key=lambda t: t.turn_number, reverse=True)[:3]
-    context = " ".join([turn.content for turn in reversed(recent_turns)])
+    recent_result = await db.execute(
+        select(Turn.content)
+        .where(Turn.story_id == story.id)
+        .order_by(Turn.turn_number.desc())
+        .limit(3)
+    )
+    recent_contents = recent_result.scalars().all()
+    context = " ".join(reversed(recent_contents))
     
     # Generate twist (use Groq if available, otherwise fallback)
     twist_content = "🌪️ Suddenly, an unexpected twist changes everything..."
     
     # Try to use Groq for AI-generated twist
-    groq_api_key = os.getenv('GROQ_API_KEY')
-    if groq_api_key:
+    client = get_groq_client()
+    if client:
         try:
-            from groq import Groq
-            client = Groq(api_key=groq_api_key)
-            
             prompt = f"""Based on this story context, write a creative plot twist in 1-2 sentences:
             
 Context: {context}
 
 Write a surprising but logical twist that adds excitement to the story. Start with an emoji that fits the twist."""
             
-            response = client.chat.completions.create(
+            response = await client.chat.completions.create(
                 model="llama3-70b-8192",
                 messages=[{"role": "user", "content": prompt}],
                 max_tokens=100,
@@ -426,8 +561,22 @@ Write a surprising but logical twist that adds excitement to the story. Start wi
             print(f"Groq API error: {e}")
             # Fall back to default twist
     
+    # Claim the next turn number and bump the counters in SQL, since players
+    # may have added turns while the twist was being generated
+    result = await db.execute(
+        update(Story)
+        .where(Story.id == story.id)
+        .values(
+            current_turn=Story.current_turn + 1,
+            total_turns=Story.total_turns + 1,
+            twist_count=Story.twist_count + 1,
+            turns_since_last_twist=0
+        )
+        .returning(Story.current_turn)
+    )
+    next_turn_number = result.scalar_one()
+    
     # Add twist turn
-    next_turn_number = max([turn.turn_number for turn in story.turns]) + 1
     twist_turn = Turn(
         story_id=story.id,
         author_name="StoryBot",
@@ -436,9 +585,9 @@ Write a surprising but logical twist that adds excitement to the story. Start wi
         turn_number=next_turn_number
     )
     db.add(twist_turn)
-    
-    story.current_turn = next_turn_number
     await db.commit()
+    await invalidate_admin_views()
+    await publish_team_event(team_id, 'turn_added', story_id=story.id, turn_number=next_turn_number)
     
     # Log admin action
     await log_admin_action(
@@ -461,27 +610,27 @@ async def update_timer(
     """Update timer duration for a room"""
     
     # Get team and active story
-    team_result = await db.execute(
-        select(Team).where(Team.code == team_code)
-    )
-    team = team_result.scalar_one_or_none()
-    if not team:
+    team = await get_team_by_code(db, team_code)
+    if team is None:
         raise HTTPException(status_code=404, detail="Team not found")
+    team_id = team.id
     
+    # Restart the active story's clock using the database time
     story_result = await db.execute(
-        select(Story).where(
-            Story.team_id == team.id,
+        update(Story)
+        .where(
+            Story.team_id == team_id,
             Story.status == StoryStatus.ACTIVE
         )
+        .values(started_at=sql_utcnow())
+        .returning(Story.id)
     )
-    story = story_result.scalar_one_or_none()
-    if not story:
+    if story_result.first() is None:
         raise HTTPException(status_code=404, detail="No active story found")
     
-    # Update the story's started_at to extend/reduce time
-    new_end_time = datetime.utcnow() + timedelta(minutes=timer_data.duration_minutes)
-    story.started_at = new_end_time - timedelta(minutes=timer_data.duration_minutes)
     await db.commit()
+    await invalidate_admin_views()
+    await publish_team_event(team_id, 'timer_updated')
     
     # Log admin action
     await log_admin_action(
@@ -503,114 +652,174 @@ async def end_room(
     """Force end a room/session"""
     
     # Get team and active story
-    team_result = await db.execute(
-        select(Team).where(Team.code == team_code)
-    )
-    team = team_result.scalar_one_or_none()
-    if not team:
+    team = await get_team_by_code(db, team_code)
+    if team is None:
         raise HTTPException(status_code=404, detail="Team not found")
+    team_id = team.id
     
+    # End the story
     story_result = await db.execute(
-        select(Story).where(
-            Story.team_id == team.id,
+        update(Story)
+        .where(
+            Story.team_id == team_id,
             Story.status == StoryStatus.ACTIVE
         )
+        .values(status=StoryStatus.COMPLETED)
+        .returning(Story.id)
     )
-    story = story_result.scalar_one_or_none()
-    if not story:
+    story_id = story_result.scalars().first()
+    if story_id is None:
         raise HTTPException(status_code=404, detail="No active story found")
     
-    # End the story
-    story.status = StoryStatus.COMPLETED
-    
     # End the session
-    session_result = await db.execute(
-        select(Session).where(
-            Session.team_id == team.id,
+    await db.execute(
+        update(Session)
+        .where(
+            Session.team_id == team_id,
             Session.status == SessionStatus.ACTIVE
         )
+        .values(status=SessionStatus.COMPLETED)
     )
-    session = session_result.scalar_one_or_none()
-    if session:
-        session.status = SessionStatus.COMPLETED
     
+    await refresh_team_leaderboard(db, team_id)
     await db.commit()
+    await invalidate_admin_views()
+    await publish_team_event(team_id, 'story_ended', story_id=story_id)
     
     # Log admin action
     await log_admin_action(
         db, admin_user, 'end_session',
         team_code=team_code,
-        payload={'story_id': str(story.id)},
+        payload={'story_id': str(story_id)},
         request=request
     )
     
-    return {"message": "Session ended", "story_id": str(story.id)}
+    return {"message": "Session ended", "story_id": str(story_id)}
 
 @router.get("/export/csv")
 async def export_csv(
+    request: Request,
     db: AsyncSession = Depends(get_db),
     admin_user: AdminUser = Depends(verify_admin)
 ):
     """Export teams and metrics as CSV"""
     
-    # Get all teams with their sessions and stories
-    result = await db.execute(
-        select(Team, Session, Story)
+    # Get all teams with their sessions and stories, with turn metrics
+    # aggregated in SQL rather than loading every turn
+    stmt = (
+        select(
+            Team.code,
+            Team.name,
+            Session.id,
+            Session.status,
+            Story.id,
+            Story.status,
+            func.count(Turn.id),
+            func.coalesce(func.sum(case((Turn.is_twist, 1), else_=0)), 0),
+            func.count(func.distinct(case((~Turn.is_twist, Turn.author_name))))
+        )
+        .select_from(Team)
         .outerjoin(Session, Team.id == Session.team_id)
         .outerjoin(Story, Team.id == Story.team_id)
-        .options(selectinload(Story.turns))
+        .outerjoin(Turn, Story.id == Turn.story_id)
+        .group_by(Team.id, Session.id, Story.id)
+        .execution_options(yield_per=1000)
     )
+    result = await db.stream(stmt)
     
-    data = result.all()
-    
-    # Create CSV content
-    output = StringIO()
-    writer = csv.writer(output)
-    
-    # Write header
-    writer.writerow([
-        'Team Code', 'Team Name', 'Session ID', 'Session Status',
-        'Story ID', 'Story Status', 'Total Turns', 'Twist Count',
-        'Unique Authors', 'Join URL', 'QR Code URL'
-    ])
-    
-    # Write data rows
-    for team, session, story in data:
-        twist_count = 0
-        unique_authors = 0
-        total_turns = 0
-        
-        if story and story.turns:
-            total_turns = len(story.turns)
-            twist_count = sum(1 for turn in story.turns if turn.is_twist)
-            unique_authors = len(set(turn.author_name for turn in story.turns if not turn.is_twist))
-        
+    # QR code URLs are relative to this API; the export needs them absolute
+    api_origin = str(request.base_url).rstrip('/')
+
+    async def generate_csv():
+        # Reuse one small buffer and yield it row by row so the export is
+        # never held in memory as a whole
+        output = StringIO()
+        writer = csv.writer(output)
+
+        # Write header
         writer.writerow([
-            team.code,
-            team.name,
-            str(session.id) if session else '',
-            session.status if session else '',
-            str(story.id) if story else '',
-            story.status if story else '',
-            total_turns,
-            twist_count,
-            unique_authors,
-            generate_join_url(team.code),
-            generate_qr_code_url(team.code)
+            'Team Code', 'Team Name', 'Session ID', 'Session Status',
+            'Story ID', 'Story Status', 'Total Turns', 'Twist Count',
+            'Unique Authors', 'Join URL', 'QR Code URL'
         ])
-    
-    # Return CSV response
-    csv_content = output.getvalue()
-    output.close()
-    
-    response = Response(
-        content=csv_content,
+        yield output.getvalue()
+
+        # Write data rows
+        async for (team_code, team_name, session_id, session_status, story_id, story_status,
+                   total_turns, twist_count, unique_authors) in result:
+            output.seek(0)
+            output.truncate()
+            writer.writerow([
+                team_code,
+                team_name,
+                str(session_id) if session_id else '',
+                session_status if session_id else '',
+                str(story_id) if story_id else '',
+                story_status if story_id else '',
+                total_turns,
+                twist_count,
+                unique_authors,
+                generate_join_url(team_code),
+                api_origin + generate_qr_code_url(team_code)
+            ])
+            yield output.getvalue()
+
+        output.close()
+
+    response = StreamingResponse(
+        generate_csv(),
         media_type="text/csv",
         headers={"Content-Disposition": "attachment; filename=story_twister_export.csv"}
     )
     add_admin_headers(response)
     return response
 
+def build_team_export(team: Team) -> Dict[str, Any]:
+    """Build the export payload for a team with its sessions, stories and turns"""
+    return {
+        'id': team.id,
+        'code': team.code,
+        'name': team.name,
+        'created_at': team.created_at,
+        'sessions': [
+            {
+                'id': session.id,
+                'started_at': session.started_at,
+                'status': session.status
+            }
+            for session in team.sessions
+        ],
+        'stories': [
+            {
+                'id': story.id,
+                'title': story.title,
+                'initial_prompt': story.initial_prompt,
+                'status': story.status,
+                'created_at': story.created_at,
+                'started_at': story.started_at,
+                'turns': [
+                    {
+                        'id': turn.id,
+                        'turn_number': turn.turn_number,
+                        'author_name': turn.author_name,
+                        'content': turn.content,
+                        'is_twist': turn.is_twist,
+                        'created_at': turn.created_at
+                    }
+                    for turn in story.turns
+                ]
+            }
+            for story in team.stories
+        ]
+    }
+
+def export_teams_query():
+    """Query loading every team with sessions, stories and turns for export"""
+    return select(Team).options(
+        selectinload(Team.sessions),
+        selectinload(Team.stories).selectinload(Story.turns)
+    )
+
 @router.get("/export/json")
 async def export_json(
     db: AsyncSession = Depends(get_db),
@@ -619,73 +828,45 @@ async def export_json(
     """Export full event data as JSON"""
     
     # Get all data with relationships
-    teams_result = await db.execute(
-        select(Team).options(
-            selectinload(Team.sessions),
-            selectinload(Team.stories).selectinload(Story.turns)
-        )
-    )
+    teams_result = await db.execute(export_teams_query())
     teams = teams_result.scalars().all()
     
-    # Build export data
+    # Build export data; orjson serializes UUIDs and datetimes natively
     export_data = {
-        'export_timestamp': datetime.utcnow().isoformat(),
-        'teams': []
+        'export_timestamp': datetime.utcnow(),
+        'teams': [build_team_export(team) for team in teams]
     }
     
-    for team in teams:
-        team_data = {
-            'id': str(team.id),
-            'code': team.code,
-            'name': team.name,
-            'created_at': team.created_at.isoformat(),
-            'sessions': [],
-            'stories': []
-        }
-        
-        # Add sessions
-        for session in team.sessions:
-            team_data['sessions'].append({
-                'id': str(session.id),
-                'started_at': session.started_at.isoformat(),
-                'status': session.status
-            })
-        
-        # Add stories with turns
-        for story in team.stories:
-            story_data = {
-                'id': str(story.id),
-                'title': story.title,
-                'initial_prompt': story.initial_prompt,
-                'status': story.status,
-                'created_at': story.created_at.isoformat(),
-                'started_at': story.started_at.isoformat() if story.started_at else None,
-                'turns': []
-            }
-            
-            # Add turns
-            for turn in sorted(story.turns, key=lambda t: t.turn_number):
-                story_data['turns'].append({
-                    'id': str(turn.id),
-                    'turn_number': turn.turn_number,
-                    'author_name': turn.author_name,
-                    'content': turn.content,
-                    'is_twist': turn.is_twist,
-                    'created_at': turn.created_at.isoformat()
-                })
-            
-            team_data['stories'].append(story_data)
-        
-        export_data['teams'].append(team_data)
-    
     response = Response(
-        content=json.dumps(export_data, indent=2),
+        content=orjson.dumps(export_data, option=orjson.OPT_INDENT_2),
         media_type="application/json",
         headers={"Content-Disposition": "attachment; filename=story_twister_full_export.json"}
     )
     add_admin_headers(response)
     return response
 
+@router.get("/export/ndjson")
+async def export_ndjson(
+    db: AsyncSession = Depends(get_db),
+    admin_user: AdminUser = Depends(verify_admin)
+):
+    """Export full event data as newline-delimited JSON, one team per line"""
+    
+    result = await db.stream(export_teams_query().execution_options(yield_per=50))
+    
+    async def generate_ndjson():
+        yield orjson.dumps({'export_timestamp': datetime.utcnow()}) + b"\n"
+        async for team in result.scalars():
+            yield orjson.dumps(build_team_export(team)) + b"\n"
+    
+    response = StreamingResponse(
+        generate_ndjson(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": "attachment; filename=story_twister_full_export.ndjson"}
+    )
+    add_admin_headers(response)
+    return response
+
 # Admin Dashboard, Live View, and Analysis endpoints
 
 class ActiveSessionResponse(BaseModel):
@@ -712,14 +893,34 @@ async def get_admin_dashboard(
 ):
     """Get admin dashboard data with active sessions"""
     
-    # Get all sessions (active and completed) with team and story data, ordered by newest first
+    # Serve from the short-lived cache while the dashboard is polling
+    cached = await cache_get(DASHBOARD_CACHE_KEY)
+    if cached:
+        return Response(content=cached, media_type="application/json")
+    
+    # Get all sessions (active and completed) with per-session turn aggregates, ordered by newest first.
+    # Counting in SQL avoids loading every story and turn just to size them.
     sessions_result = await db.execute(
-        select(Session).options(
-            selectinload(Session.team).selectinload(Team.stories).selectinload(Story.turns)
-        ).where(Session.status.in_([SessionStatus.WAITING, SessionStatus.ACTIVE, SessionStatus.COMPLETED]))
+        select(
+            Session.id,
+            Session.status,
+            Session.started_at,
+            Team.code,
+            Team.name,
+            func.count(Turn.id).label("total_turns"),
+            func.coalesce(func.sum(case((Turn.is_twist, 1), else_=0)), 0).label("twist_count"),
+            func.count(func.distinct(case((~Turn.is_twist, Turn.author_name)))).label("participants")
+        )
+        .select_from(Session)
+        .join(Team, Session.team_id == Team.id)
+        .outerjoin(Story, Story.team_id == Team.id)
+        .outerjoin(Turn, Turn.story_id == Story.id)
+        .where(Session.status.in_([SessionStatus.WAITING, SessionStatus.ACTIVE, SessionStatus.COMPLETED]))
+        .group_by(Session.id, Team.id)
         .order_by(desc(Session.id))
     )
-    sessions = sessions_result.scalars().all()
+    sessions = sessions_result.all()
+    now = datetime.utcnow()
     
     # Initialize session list and status counts
     active_sessions = []
@@ -731,20 +932,6 @@ async def get_admin_dashboard(
     }
     
     for session in sessions:
-        # Count participants (unique authors in turns)
-        participants = set()
-        total_turns = 0
-        twist_count = 0
-        
-        # Access stories through the team relationship
-        for story in session.team.stories:
-            for turn in story.turns:
-                if not turn.is_twist:
-                    participants.add(turn.author_name)
-                else:
-                    twist_count += 1
-                total_turns += 1
-        
         # Determine session status and time remaining
         default_duration = 10  # Default 10 minutes for sessions
         
@@ -756,7 +943,7 @@ async def get_admin_dashboard(
             time_remaining = "00:00"
         elif session.started_at:
             # Active session with start time
-            elapsed = datetime.utcnow() - session.started_at
+            elapsed = now - session.started_at
             remaining = timedelta(minutes=default_duration) - elapsed
             if remaining.total_seconds() > 0:
                 minutes = int(remaining.total_seconds() // 60)
@@ -776,7 +963,7 @@ async def get_admin_dashboard(
             status_counts["waiting"] += 1
         elif session_status == "active":
             status_counts["active"] += 1
-            if len(participants) > 0:
+            if session.participants > 0:
                 status_counts["in_progress"] += 1
         elif session_status == "completed":
             status_counts["completed"] += 1
@@ -785,24 +972,28 @@ async def get_admin_dashboard(
         if True:  # Show all sessions for admin visibility
             active_sessions.append(ActiveSessionResponse(
                 id=str(session.id),
-                team_code=session.team.code,
-                team_name=session.team.name,
-                participants=len(participants),
+                team_code=session.code,
+                team_name=session.name,
+                participants=session.participants,
                 status=session_status,
                 time_remaining=time_remaining,
-                total_turns=total_turns,
-                twist_count=twist_count,
+                total_turns=session.total_turns,
+                twist_count=session.twist_count,
                 started_at=session.started_at.isoformat() if session.started_at else ""
             ))
             
             status_counts[session_status] += 1
     
-    return DashboardResponse(
+    response_data = DashboardResponse(
         active_sessions=active_sessions,
         total_active=status_counts["active"],
         total_in_progress=status_counts["active"],  # Same as active for now
         total_waiting=status_counts["waiting"]
     )
+    
+    content = response_data.model_dump_json()
+    await cache_set(DASHBOARD_CACHE_KEY, content, ADMIN_VIEW_TTL_SECONDS)
+    return Response(content=content, media_type="application/json")
 
 class LiveMessageResponse(BaseModel):
     id: str
@@ -827,7 +1018,7 @@ class LiveViewResponse(BaseModel):
 
 @router.get("/live/{session_id}", response_model=LiveViewResponse)
 async def get_live_view(
-    session_id: str,
+    session_id: uuid.UUID,
     db: AsyncSession = Depends(get_db),
     admin_user: AdminUser = Depends(verify_admin)
 ):
@@ -837,21 +1028,25 @@ async def get_live_view(
     session_result = await db.execute(
         select(Session).options(
             selectinload(Session.team).selectinload(Team.stories).selectinload(Story.turns)
-        ).where(Session.id == uuid.UUID(session_id))
+            .load_only(Turn.author_name, Turn.is_twist, Turn.content, Turn.created_at)
+        ).where(Session.id == session_id)
     )
     session = session_result.scalar_one_or_none()
     
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    # Build messages from turns
-    messages = []
+    # Build messages from turns; each story's messages are already in time order
+    story_streams = []
     participants = set()
     total_turns = 0
     twist_count = 0
     
     # Access stories through the team relationship
     for story in session.team.stories:
+        messages = []
+        story_streams.append(messages)
+        
         # Add system message for story start
         if story.initial_prompt:
             messages.append(LiveMessageResponse(
@@ -863,7 +1058,7 @@ async def get_live_view(
             ))
         
         # Add all turns as messages
-        for turn in sorted(story.turns, key=lambda t: t.turn_number):
+        for turn in story.turns:
             if turn.is_twist:
                 messages.append(LiveMessageResponse(
                     id=str(turn.id),
@@ -884,8 +1079,8 @@ async def get_live_view(
                 participants.add(turn.author_name)
             total_turns += 1
     
-    # Sort messages by timestamp
-    messages.sort(key=lambda m: m.timestamp)
+    # Interleave the per-story streams by timestamp without re-sorting everything
+    messages = list(heapq.merge(*story_streams, key=lambda m: m.timestamp))
     
     # Calculate time remaining
     time_remaining = "10:00"
@@ -910,10 +1105,52 @@ async def get_live_view(
         twist_count=twist_count
     )
     
-    return LiveViewResponse(
+    # Serialize directly so FastAPI doesn't re-validate the (potentially long) message list
+    live_view = LiveViewResponse(
         session_info=session_info,
         messages=messages
     )
+    return ORJSONResponse(content=live_view.model_dump(mode='json'))
+
+@router.get("/live/{session_id}/stream")
+async def stream_live_view(
+    session_id: uuid.UUID,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    admin_user: AdminUser = Depends(verify_admin)
+):
+    """Server-Sent Events stream announcing changes to a session's stories.
+    
+    Clients refetch the live view when an event arrives instead of polling it.
+    Returns 503 when Redis pub/sub is not configured so clients can fall back to polling.
+    """
+    if not live_events_enabled():
+        raise HTTPException(status_code=503, detail="Live updates unavailable")
+    
+    team_result = await db.execute(
+        select(Session.team_id).where(Session.id == session_id)
+    )
+    team_id = team_result.scalar_one_or_none()
+    if team_id is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    # Release the connection before the long-lived stream starts
+    await db.close()
+    
+    async def event_stream():
+        yield b"event: ready\ndata: {}\n\n"
+        async for payload in subscribe_team_events(team_id):
+            if await request.is_disconnected():
+                break
+            if payload is None:
+                yield b": keepalive\n\n"
+            else:
+                yield b"data: " + payload + b"\n\n"
+    
+    response = StreamingResponse(event_stream(), media_type="text/event-stream")
+    add_admin_headers(response)
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
 
 class CompletedSessionResponse(BaseModel):
     id: str
@@ -953,38 +1190,42 @@ async def get_analysis_list(
 ):
     """Get list of completed sessions for analysis"""
     
-    # Get completed sessions
+    # Get completed sessions with participant and turn counts aggregated in SQL.
+    # Stories belong to teams, not sessions (there is no Session.stories), so
+    # counts cover all of the session's team stories.
     sessions_result = await db.execute(
-        select(Session).options(
-            selectinload(Session.team).selectinload(Team.stories).selectinload(Story.turns)
-        ).where(Session.status == SessionStatus.COMPLETED)
+        select(
+            Session.id,
+            Session.started_at,
+            Session.ended_at,
+            Team.code,
+            Team.name,
+            func.count(Turn.id).label("total_turns"),
+            func.count(func.distinct(case((~Turn.is_twist, Turn.author_name)))).label("participants")
+        )
+        .select_from(Session)
+        .join(Team, Session.team_id == Team.id)
+        .outerjoin(Story, Story.team_id == Team.id)
+        .outerjoin(Turn, Turn.story_id == Story.id)
+        .where(Session.status == SessionStatus.COMPLETED)
+        .group_by(Session.id, Team.id)
         .order_by(desc(Session.ended_at))
     )
-    sessions = sessions_result.scalars().all()
+    sessions = sessions_result.all()
     
     completed_sessions = []
     
     for session in sessions:
-        participants = set()
-        total_turns = 0
-        
-        # Access stories through the team relationship
-        for story in session.team.stories:
-            for turn in story.turns:
-                if not turn.is_twist:
-                    participants.add(turn.author_name)
-                total_turns += 1
-        
         # Calculate overall score (simplified)
-        overall_score = min(100, 50 + (len(participants) * 10) + (total_turns * 2))
+        overall_score = min(100, 50 + (session.participants * 10) + (session.total_turns * 2))
         
         completed_sessions.append(CompletedSessionResponse(
             id=str(session.id),
-            team_code=session.team.code,
-            team_name=session.team.name,
+            team_code=session.code,
+            team_name=session.name,
             completed_at=session.ended_at.isoformat() if session.ended_at else session.started_at.isoformat(),
-            participants=len(participants),
-            total_turns=total_turns,
+            participants=session.participants,
+            total_turns=session.total_turns,
             overall_score=overall_score
         ))
     
@@ -992,43 +1233,63 @@ async def get_analysis_list(
 
 @router.get("/analysis/{session_id}", response_model=SessionAnalysisResponse)
 async def get_session_analysis(
-    session_id: str,
+    session_id: uuid.UUID,
     db: AsyncSession = Depends(get_db),
     admin_user: AdminUser = Depends(verify_admin)
 ):
     """Get detailed analysis for a specific session"""
     
-    # Get session with all related data
+    # Get session with its team; turn data is aggregated in SQL below
     session_result = await db.execute(
-        select(Session).options(
-            selectinload(Session.team),
-            selectinload(Session.stories).selectinload(Story.turns)
-        ).where(Session.id == uuid.UUID(session_id))
+        select(Session).options(selectinload(Session.team))
+        .where(Session.id == session_id)
     )
     session = session_result.scalar_one_or_none()
     
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    # Analyze session data
-    participants = set()
-    participant_contributions = {}
-    total_turns = 0
-    user_turns = 0
-    twist_count = 0
-    word_count = 0
+    team_turns = (
+        select(Turn)
+        .join(Story, Turn.story_id == Story.id)
+        .where(Story.team_id == session.team_id)
+    )
     
-    for story in session.stories:
-        for turn in story.turns:
-            total_turns += 1
-            word_count += len(turn.content.split())
-            
-            if turn.is_twist:
-                twist_count += 1
-            else:
-                user_turns += 1
-                participants.add(turn.author_name)
-                participant_contributions[turn.author_name] = participant_contributions.get(turn.author_name, 0) + 1
+    # Totals across all of the team's stories
+    totals_query = team_turns.with_only_columns(
+        func.count().filter(Turn.is_twist).label("twist_count"),
+        func.count().filter(~Turn.is_twist).label("user_turns"),
+        # Words as str.split() counts them: trim all whitespace, and let blank
+        # content become NULL so it adds nothing to the sum
+        func.coalesce(
+            func.sum(func.array_length(func.regexp_split_to_array(
+                func.nullif(func.regexp_replace(Turn.content, r'^\s+|\s+$', '', 'g'), ''), r'\s+'
+            ), 1)), 0
+        ).label("word_count")
+    )
+    
+    # Per-author contributions (user turns only)
+    contributions_query = (
+        team_turns.with_only_columns(Turn.author_name, func.count())
+        .where(~Turn.is_twist)
+        .group_by(Turn.author_name)
+    )
+    
+    # The two reads are independent; an AsyncSession can't run concurrent
+    # statements, so the second one uses its own pooled session
+    async with async_session() as contributions_db:
+        totals_result, contributions_result = await asyncio.gather(
+            db.execute(totals_query),
+            contributions_db.execute(contributions_query)
+        )
+        totals = totals_result.one()
+        participant_contributions = dict(contributions_result.all())
+    
+    twist_count = totals.twist_count
+    user_turns = totals.user_turns
+    total_turns = twist_count + user_turns
+    word_count = totals.word_count
+    participants = list(participant_contributions)
     
     # Calculate scores (simplified algorithm)
     creativity_score = min(100, 60 + (twist_count * 5) + (len(participants) * 3))
@@ -1055,7 +1316,7 @@ async def get_session_analysis(
         user_turns=user_turns,
         twist_count=twist_count,
         word_count=word_count,
-        participants=list(participants),
+        participants=participants,
         creativity_score=creativity_score,
         engagement_score=engagement_score,
         collaboration_score=collaboration_score,
@@ -1099,45 +1360,40 @@ async def create_session(
     if not team_code or len(team_code) < 2:
         raise HTTPException(status_code=422, detail="Team code must be at least 2 characters")
     
-    # Check if team already exists
-    existing_team = await db.execute(
-        select(Team).where(Team.code == team_code)
-    )
-    if existing_team.scalar_one_or_none():
-        raise HTTPException(status_code=409, detail=f"Team with code '{team_code}' already exists")
-    
     try:
-        # Create new team
+        # Create team, session and story in a single flush; ids are assigned
+        # client-side and the unique constraint on Team.code rejects duplicates
         team_name = session_data.team_name or f"Team {team_code}"
         new_team = Team(
+            id=uuid.uuid4(),
             code=team_code,
-            name=team_name,
-            created_at=datetime.utcnow()
+            name=team_name
         )
-        db.add(new_team)
-        await db.flush()  # Get team ID
         
         # Create new session in WAITING state
         new_session = Session(
             id=uuid.uuid4(),
             team_id=new_team.id,
             status=SessionStatus.WAITING,
-            started_at=None  # Will be set when admin starts the session
+            started_at=null()  # Set when admin starts the session; null() overrides the server default
         )
-        db.add(new_session)
-        await db.flush()  # Get session ID
         
         # Create initial story for the team
         initial_story = Story(
             team_id=new_team.id,
             title=f"Story for {team_name}",
             initial_prompt="Welcome to the collaborative storytelling session! Let your creativity flow as you build an amazing story together.",
-            status=StoryStatus.ACTIVE,
-            created_at=datetime.utcnow()
+            status=StoryStatus.ACTIVE
         )
-        db.add(initial_story)
+        db.add_all([new_team, new_session, initial_story])
         
-        await db.commit()
+        try:
+            await db.commit()
+        except IntegrityError:
+            await db.rollback()
+            raise HTTPException(status_code=409, detail=f"Team with code '{team_code}' already exists")
+        cache_team(team_code, CachedTeam(new_team.id, new_team.name, new_team.created_at))
+        await invalidate_admin_views()
         
         # Generate join URL
         join_url = generate_join_url(team_code)
@@ -1158,36 +1414,29 @@ async def create_session(
             message=f"Session created successfully for team '{team_code}'"
         )
         
-        response = Response(
-            content=response_data.model_dump_json(),
-            media_type="application/json"
-        )
+        response = ORJSONResponse(content=response_data.model_dump())
         add_admin_headers(response)
         return response
         
+    except HTTPException:
+        raise
     except Exception as e:
         await db.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to create session: {str(e)}")
 
 @router.post("/sessions/{session_id}/start")
 async def start_session(
-    session_id: str,
+    session_id: uuid.UUID,
     request: Request,
     db: AsyncSession = Depends(get_db),
     admin_user: AdminUser = Depends(verify_admin)
 ):
     """Start a waiting session"""
     try:
-        # Validate session ID format
-        try:
-            session_uuid = uuid.UUID(session_id)
-        except ValueError:
-            raise HTTPException(status_code=422, detail="Invalid session ID format")
-        
         # Get session with team
         session_result = await db.execute(
             select(Session).options(selectinload(Session.team))
-            .where(Session.id == session_uuid)
+            .where(Session.id == session_id)
         )
         session = session_result.scalar_one_or_none()
         
@@ -1202,6 +1451,7 @@ async def start_session(
         session.started_at = datetime.utcnow()
         
         await db.commit()
+        await invalidate_admin_views()
         
         # Log admin action
         await log_admin_action(
@@ -1217,10 +1467,7 @@ async def start_session(
             "message": f"Session started successfully for team '{session.team.code}'"
         }
         
-        response = Response(
-            content=json.dumps(response_data),
-            media_type="application/json"
-        )
+        response = ORJSONResponse(content=response_data)
         add_admin_headers(response)
         return response
         
@@ -1232,7 +1479,7 @@ async def start_session(
 
 @router.delete("/sessions/{session_id}", response_model=DeleteSessionResponse)
 async def delete_session(
-    session_id: str,
+    session_id: uuid.UUID,
     request: Request,
     db: AsyncSession = Depends(get_db),
     admin_user: AdminUser = Depends(verify_admin)
@@ -1240,16 +1487,10 @@ async def delete_session(
     """Delete a chat session and all associated data"""
     
     try:
-        # Validate session ID format
-        try:
-            session_uuid = uuid.UUID(session_id)
-        except ValueError:
-            raise HTTPException(status_code=422, detail="Invalid session ID format")
-        
         # Find the session with team data
         session_result = await db.execute(
             select(Session).options(selectinload(Session.team))
-            .where(Session.id == session_uuid)
+            .where(Session.id == session_id)
         )
         session = session_result.scalar_one_or_none()
         
@@ -1261,64 +1502,54 @@ async def delete_session(
         # Delete all related data in correct order (respecting foreign keys)
         
         try:
-            # 1. Get all stories for this team (handle if none exist)
-            stories_result = await db.execute(
-                select(Story).options(
-                    selectinload(Story.turns),
-                    selectinload(Story.analyses)
-                ).where(Story.team_id == session.team_id)
-            )
-            stories = stories_result.scalars().all()
+            # Bulk-delete by team without loading the rows first
+            team_story_ids = select(Story.id).where(Story.team_id == session.team_id)
             
-            # 2. Delete session analyses first (if any exist)
-            for story in stories:
-                if hasattr(story, 'analyses') and story.analyses:
-                    for analysis in story.analyses:
-                        await db.execute(delete(SessionAnalysis).where(SessionAnalysis.id == analysis.id))
+            # 1. Delete session analyses first (if any exist)
+            await db.execute(delete(SessionAnalysis).where(SessionAnalysis.story_id.in_(team_story_ids)).execution_options(synchronize_session=False))
             
-            # 3. Delete story turns (if any exist)
-            for story in stories:
-                if hasattr(story, 'turns') and story.turns:
-                    for turn in story.turns:
-                        await db.execute(delete(Turn).where(Turn.id == turn.id))
+            # 2. Delete story turns (if any exist)
+            await db.execute(delete(Turn).where(Turn.story_id.in_(team_story_ids)).execution_options(synchronize_session=False))
             
-            # 4. Delete stories (if any exist)
-            for story in stories:
-                await db.execute(delete(Story).where(Story.id == story.id))
+            # 3. Delete stories (if any exist)
+            deleted_stories = await db.execute(
+                delete(Story).where(Story.team_id == session.team_id)
+                .returning(Story.id)
+                .execution_options(synchronize_session=False)
+            )
+            deleted_story_ids = deleted_stories.scalars().all()
             
-            # 5. Delete session (but keep team as it may be shared with other sessions)
+            # 4. Delete session (but keep team as it may be shared with other sessions)
             await db.execute(delete(Session).where(Session.id == session.id))
+            await refresh_team_leaderboard(db, session.team_id)
             
             # Note: We don't delete the team because it may be referenced by other sessions
             # Teams are shared resources and should only be deleted when no sessions reference them
                 
         except Exception as delete_error:
-            print(f"❌ DELETE SESSION ERROR: {type(delete_error).__name__}: {str(delete_error)}")
-            import traceback
-            print(f"❌ DELETE SESSION TRACEBACK:\n{traceback.format_exc()}")
+            logger.exception("delete_session failed for session %s", session_id)
             await db.rollback()
             raise HTTPException(status_code=500, detail=f"Failed to delete session data: {str(delete_error)}")
         
         await db.commit()
+        evict_analyses(deleted_story_ids)
+        await invalidate_admin_views()
         
         # Log admin action
         await log_admin_action(
             db, admin_user, "delete_session",
             team_code,
-            {"team_code": team_code, "session_id": session_id}
+            {"team_code": team_code, "session_id": str(session_id)}
         )
         
         response_data = DeleteSessionResponse(
-            session_id=session_id,
+            session_id=str(session_id),
             team_code=team_code,
             status="success",
             message=f"Session and team '{team_code}' deleted successfully"
         )
         
-        response = Response(
-            content=response_data.model_dump_json(),
-            media_type="application/json"
-        )
+        response = ORJSONResponse(content=response_data.model_dump())
         add_admin_headers(response)
         return response
         
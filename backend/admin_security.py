@@ -4,31 +4,62 @@ Provides authentication, authorization, and security middleware for admin APIs
 """
 
 import os
+import asyncio
 import hashlib
 import json
+import uuid
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
 from fastapi import HTTPException, Depends, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update, insert
+from cachetools import TTLCache
 import jwt
-from passlib.context import CryptContext
+import bcrypt
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 
-from database import get_db
+from database import get_db, async_session
 from models import User, ApiToken, AdminAction
 
 # Initialize security components
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+BCRYPT_ROUNDS = 12
 security = HTTPBearer(auto_error=False)
 limiter = Limiter(key_func=get_remote_address)
 
 # Environment variables
 ADMIN_JWT_SECRET = os.getenv('ADMIN_JWT_SECRET', 'dev-jwt-secret-change-in-production')
 ALLOWED_ORIGINS = os.getenv('ALLOWED_ORIGINS', 'http://localhost:3000,http://localhost:5173,http://localhost:8001').split(',')
+ALLOWED_ORIGINS_SET = frozenset(origin.strip() for origin in ALLOWED_ORIGINS)
+ALLOWED_HOSTS_SET = frozenset(
+    [allowed_origin.split('://', 1)[-1] for allowed_origin in ALLOWED_ORIGINS_SET]
+    # Also allow internal Docker requests (localhost, backend container)
+    + ['localhost:8000', '0.0.0.0:8000', 'backend:8000']
+    # Allow production domain through Caddy reverse proxy
+    + ['habkah.alrumahi.site', 'habkah.alrumahi.site:443']
+)
+JWT_DECODE_OPTIONS = {'require': ['exp', 'sub', 'username']}
+
+# Verified API tokens keyed by SHA-256 digest: [AdminUser, expires_at, last_used].
+# Revoked tokens stay usable for at most the cache TTL.
+_token_cache: TTLCache = TTLCache(maxsize=1024, ttl=30)
+LAST_USED_WRITE_INTERVAL = timedelta(seconds=60)
+_background_tasks = set()
+
+# Audit rows waiting to be bulk-inserted by run_audit_writer()
+audit_queue: asyncio.Queue = asyncio.Queue()
+AUDIT_BATCH_SIZE = 100
+AUDIT_FLUSH_INTERVAL_SECONDS = 0.2
+AUDIT_SHUTDOWN_TIMEOUT_SECONDS = 10
+# Queued by stop_audit_writer() to make run_audit_writer() exit once drained
+_AUDIT_STOP = object()
+
+# Successful authentications aggregated per (user_id, token_hash, endpoint) as
+# [count, first_seen, last_seen], written to the audit log once per interval
+_auth_counts: Dict[tuple, list] = {}
+AUTH_AUDIT_INTERVAL_SECONDS = 60
 
 class AdminAuthError(HTTPException):
     """Custom exception for admin authentication errors"""
@@ -51,7 +82,7 @@ async def verify_same_origin(request: Request) -> bool:
     # while still maintaining token-based security
     if origin:
         # Check if origin is in allowed origins
-        if origin in ALLOWED_ORIGINS:
+        if origin in ALLOWED_ORIGINS_SET:
             return True
         # Allow requests from the production domain (Caddy reverse proxy)
         if 'habkah.alrumahi.site' in origin:
@@ -59,65 +90,83 @@ async def verify_same_origin(request: Request) -> bool:
     
     # For non-CORS requests, check host header
     if host:
-        allowed_hosts = [allowed_origin.replace('http://', '').replace('https://', '') for allowed_origin in ALLOWED_ORIGINS]
-        # Also allow internal Docker requests (localhost, backend container)
-        allowed_hosts.extend(['localhost:8000', '0.0.0.0:8000', 'backend:8000'])
-        # Allow production domain through Caddy reverse proxy
-        allowed_hosts.extend(['habkah.alrumahi.site', 'habkah.alrumahi.site:443'])
-        return host in allowed_hosts
+        return host in ALLOWED_HOSTS_SET
     
     # Allow requests without origin/host headers for internal testing
     # This handles cases like Docker container-to-container communication
     return True
 
+async def _write_token_last_used(token_digest: bytes, last_used: datetime):
+    """Persist a token's last_used timestamp on its own short-lived session"""
+    try:
+        async with async_session() as db:
+            await db.execute(
+                update(ApiToken)
+                .where(ApiToken.token_hash == token_digest)
+                .values(last_used=last_used)
+            )
+            await db.commit()
+    except Exception as e:
+        print(f"Failed to update token last_used: {e}")
+
 async def verify_api_token(token: str, db: AsyncSession) -> Optional[AdminUser]:
     """Verify API token and return admin user"""
-    token_hash = hashlib.sha256(token.encode()).hexdigest()
-    
-    # Query for active token
-    result = await db.execute(
-        select(ApiToken, User)
-        .join(User, ApiToken.user_id == User.id)
-        .where(
-            ApiToken.token_hash == token_hash,
-            ApiToken.is_active == True,
-            User.role == 'admin',
-            User.is_active == True
-        )
-    )
+    token_digest = hashlib.sha256(token.encode()).digest()
+    now = datetime.utcnow()
     
-    token_user = result.first()
-    if not token_user:
-        return None
+    cached = _token_cache.get(token_digest)
+    if cached is None:
+        # Query for active token
+        result = await db.execute(
+            select(ApiToken, User)
+            .join(User, ApiToken.user_id == User.id)
+            .where(
+                ApiToken.token_hash == token_digest,
+                ApiToken.is_active == True,
+                User.role == 'admin',
+                User.is_active == True
+            )
+        )
+        
+        token_user = result.first()
+        if not token_user:
+            return None
+        
+        api_token, user = token_user
+        # The audit log records the hex form of the digest
+        admin_user = AdminUser(user_id=str(user.id), username=user.username, token_hash=token_digest.hex())
+        cached = [admin_user, api_token.expires_at, api_token.last_used]
+        _token_cache[token_digest] = cached
     
-    api_token, user = token_user
+    admin_user, expires_at, last_used = cached
     
     # Check token expiration
-    if api_token.expires_at and api_token.expires_at < datetime.utcnow():
+    if expires_at and expires_at < now:
         return None
     
-    # Update last used timestamp
-    api_token.last_used = datetime.utcnow()
-    await db.commit()
+    # Update last used timestamp at most once per interval, off the request path
+    if last_used is None or now - last_used >= LAST_USED_WRITE_INTERVAL:
+        cached[2] = now
+        task = asyncio.create_task(_write_token_last_used(token_digest, now))
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
     
-    return AdminUser(user_id=str(user.id), username=user.username, token_hash=token_hash)
+    return admin_user
 
 async def verify_jwt_token(token: str) -> Optional[AdminUser]:
     """Verify JWT token and return admin user"""
     try:
-        payload = jwt.decode(token, ADMIN_JWT_SECRET, algorithms=['HS256'])
-        
-        # Verify required claims
-        if payload.get('aud') != 'admin' or payload.get('iss') != 'plot-twister':
-            return None
-        
-        # Check expiration
-        exp = payload.get('exp')
-        if exp and datetime.fromtimestamp(exp) < datetime.utcnow():
-            return None
+        # PyJWT checks signature, expiry, audience, issuer and required claims
+        payload = jwt.decode(
+            token, ADMIN_JWT_SECRET,
+            algorithms=['HS256'],
+            audience='admin',
+            issuer='plot-twister',
+            options=JWT_DECODE_OPTIONS
+        )
         
-        user_id = payload.get('sub')
-        username = payload.get('username')
+        user_id = payload['sub']
+        username = payload['username']
         
         if not user_id or not username:
             return None
@@ -135,19 +184,110 @@ async def log_admin_action(
     payload: Optional[Dict[str, Any]] = None,
     request: Optional[Request] = None
 ):
-    """Log admin action for audit trail"""
-    admin_action = AdminAction(
-        user_id=admin_user.user_id if admin_user.user_id != 'system' else None,
-        token_hash=admin_user.token_hash,
-        action=action,
-        team_code=team_code,
-        payload_json=json.dumps(payload) if payload else None,
-        ip_address=get_remote_address(request) if request else None,
-        user_agent=request.headers.get('user-agent') if request else None
-    )
-    
-    db.add(admin_action)
-    await db.commit()
+    """Queue admin action for the audit trail (written in batches by run_audit_writer)"""
+    audit_queue.put_nowait({
+        'id': uuid.uuid4(),
+        'user_id': admin_user.user_id if admin_user.user_id != 'system' else None,
+        'token_hash': admin_user.token_hash,
+        'action': action,
+        'team_code': team_code,
+        'payload_json': json.dumps(payload) if payload else None,
+        'ip_address': get_remote_address(request) if request else None,
+        'user_agent': request.headers.get('user-agent') if request else None,
+        'created_at': datetime.utcnow()
+    })
+
+async def _write_audit_rows(rows):
+    """Bulk insert a batch of audit rows"""
+    try:
+        async with async_session() as db:
+            await db.execute(insert(AdminAction), rows)
+            await db.commit()
+    except Exception as e:
+        print(f"Failed to write {len(rows)} audit log rows: {e}")
+
+async def flush_audit_queue():
+    """Write any queued audit rows immediately (used on shutdown)"""
+    rows = []
+    while not audit_queue.empty():
+        row = audit_queue.get_nowait()
+        if row is not _AUDIT_STOP:
+            rows.append(row)
+    if rows:
+        await _write_audit_rows(rows)
+
+def record_authentication(admin_user: AdminUser, request: Request):
+    """Count a successful authentication instead of auditing every request"""
+    key = (admin_user.user_id, admin_user.token_hash, request.url.path)
+    now = datetime.utcnow()
+    entry = _auth_counts.get(key)
+    if entry is None:
+        _auth_counts[key] = [1, now, now]
+    else:
+        entry[0] += 1
+        entry[2] = now
+
+def flush_authentication_counts():
+    """Queue one 'authenticate' audit row per aggregated key and reset the counts"""
+    entries = list(_auth_counts.items())
+    _auth_counts.clear()
+    for (user_id, token_hash, endpoint), (count, first_seen, last_seen) in entries:
+        audit_queue.put_nowait({
+            'id': uuid.uuid4(),
+            'user_id': user_id if user_id != 'system' else None,
+            'token_hash': token_hash,
+            'action': 'authenticate',
+            'team_code': None,
+            'payload_json': json.dumps({
+                'endpoint': endpoint,
+                'count': count,
+                'first_seen': first_seen.isoformat(),
+                'last_seen': last_seen.isoformat()
+            }),
+            'ip_address': None,
+            'user_agent': None,
+            'created_at': last_seen
+        })
+
+async def run_auth_audit_aggregator():
+    """Background task flushing aggregated authentication counts every interval"""
+    while True:
+        await asyncio.sleep(AUTH_AUDIT_INTERVAL_SECONDS)
+        flush_authentication_counts()
+
+async def run_audit_writer():
+    """Background task draining audit_queue in batches of up to AUDIT_BATCH_SIZE rows"""
+    loop = asyncio.get_running_loop()
+    stopping = False
+    while not stopping:
+        row = await audit_queue.get()
+        if row is _AUDIT_STOP:
+            return
+        rows = [row]
+        deadline = loop.time() + AUDIT_FLUSH_INTERVAL_SECONDS
+        while len(rows) < AUDIT_BATCH_SIZE:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                row = await asyncio.wait_for(audit_queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            if row is _AUDIT_STOP:
+                stopping = True
+                break
+            rows.append(row)
+        await _write_audit_rows(rows)
+
+async def stop_audit_writer(writer: asyncio.Task):
+    """Let the writer finish the batch it holds and everything queued before
+    stopping, instead of cancelling it mid-batch; then flush any leftovers"""
+    audit_queue.put_nowait(_AUDIT_STOP)
+    try:
+        await asyncio.wait_for(writer, AUDIT_SHUTDOWN_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        print("⚠️ Audit writer did not finish in time")
+    await flush_audit_queue()
 
 @limiter.limit("10/minute")
 async def verify_admin(
@@ -178,12 +318,8 @@ async def verify_admin(
     if not admin_user:
         raise AdminAuthError("Invalid or missing admin credentials")
     
-    # Log the authentication
-    await log_admin_action(
-        db, admin_user, 'authenticate', 
-        payload={'endpoint': str(request.url.path)}, 
-        request=request
-    )
+    # Count the authentication; aggregated rows reach the audit log once a minute
+    record_authentication(admin_user, request)
     
     return admin_user
 
@@ -211,8 +347,12 @@ def create_admin_jwt(user_id: str, username: str, expires_hours: int = 24) -> st
 
 def hash_password(password: str) -> str:
     """Hash password using bcrypt"""
-    return pwd_context.hash(password)
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=BCRYPT_ROUNDS)).decode()
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify password against hash"""
-    return pwd_context.verify(plain_password, hashed_password)
+    try:
+        return bcrypt.checkpw(plain_password.encode(), hashed_password.encode())
+    except ValueError:
+        # Malformed hash
+        return False
@@ -0,0 +1,27 @@
+"""Add composite lookup indexes
+
+Revision ID: 7b3e9d2a41c5
+Revises: 573e8f76f1a6
+Create Date: 2026-10-15 09:12:40.118203
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '7b3e9d2a41c5'
+down_revision = '573e8f76f1a6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('idx_sessions_team_status', 'sessions', ['team_id', 'status'])
+    op.create_index('idx_stories_team_status', 'stories', ['team_id', 'status'])
+    op.create_index('idx_turns_story_turn_number', 'turns', ['story_id', 'turn_number'])
+
+
+def downgrade() -> None:
+    op.drop_index('idx_turns_story_turn_number', table_name='turns')
+    op.drop_index('idx_stories_team_status', table_name='stories')
+    op.drop_index('idx_sessions_team_status', table_name='sessions')
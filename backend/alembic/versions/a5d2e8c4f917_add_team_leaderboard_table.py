@@ -0,0 +1,47 @@
+"""Add team leaderboard table
+
+Revision ID: a5d2e8c4f917
+Revises: f3a7c2d9b614
+Create Date: 2026-10-15 13:07:42.318560
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'a5d2e8c4f917'
+down_revision = 'f3a7c2d9b614'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'team_leaderboard',
+        sa.Column('team_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('teams.id'), primary_key=True),
+        sa.Column('team_code', sa.String(length=50), nullable=False),
+        sa.Column('team_name', sa.String(length=255), nullable=False),
+        sa.Column('participants', sa.Integer(), nullable=False),
+        sa.Column('stories_completed', sa.Integer(), nullable=False),
+        sa.Column('total_turns', sa.Integer(), nullable=False),
+        sa.Column('twist_count', sa.Integer(), nullable=False),
+        sa.Column('user_turns', sa.Integer(), nullable=False),
+        sa.Column('avg_creativity_score', sa.Float(), nullable=True),
+        sa.Column('avg_engagement_score', sa.Float(), nullable=True),
+        sa.Column('avg_collaboration_score', sa.Float(), nullable=True),
+        sa.Column('last_active', sa.DateTime(), nullable=True),
+        sa.Column('session_status', sa.String(length=20), nullable=False),
+        sa.Column('session_ended_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.text("timezone('utc', now())"), nullable=True),
+    )
+    op.create_index(
+        'idx_team_leaderboard_rank', 'team_leaderboard',
+        [sa.text('stories_completed DESC'), sa.text('total_turns DESC')]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_team_leaderboard_rank', table_name='team_leaderboard')
+    op.drop_table('team_leaderboard')
@@ -0,0 +1,36 @@
+"""Add aggregation covering indexes
+
+Revision ID: b8c1f4e6d392
+Revises: a5d2e8c4f917
+Create Date: 2026-10-15 13:41:19.852407
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b8c1f4e6d392'
+down_revision = 'a5d2e8c4f917'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'idx_turns_story_author_twist', 'turns',
+        ['story_id', 'author_name', 'is_twist'],
+        postgresql_include=['turn_number']
+    )
+    # Supersedes idx_sessions_team_status, which is its prefix
+    op.create_index(
+        'idx_sessions_team_status_started', 'sessions',
+        ['team_id', 'status', sa.text('started_at DESC')]
+    )
+    op.drop_index('idx_sessions_team_status', table_name='sessions')
+
+
+def downgrade() -> None:
+    op.create_index('idx_sessions_team_status', 'sessions', ['team_id', 'status'])
+    op.drop_index('idx_sessions_team_status_started', table_name='sessions')
+    op.drop_index('idx_turns_story_author_twist', table_name='turns')
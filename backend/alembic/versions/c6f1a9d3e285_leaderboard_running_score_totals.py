@@ -0,0 +1,64 @@
+"""Keep running score totals on team leaderboard
+
+Revision ID: c6f1a9d3e285
+Revises: b8c1f4e6d392
+Create Date: 2026-10-15 14:02:37.614093
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c6f1a9d3e285'
+down_revision = 'b8c1f4e6d392'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('team_leaderboard', sa.Column('creativity_sum', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('team_leaderboard', sa.Column('engagement_sum', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('team_leaderboard', sa.Column('collaboration_sum', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('team_leaderboard', sa.Column('analysis_count', sa.Integer(), nullable=False, server_default='0'))
+
+    # Backfill from existing analyses
+    op.execute("""
+        UPDATE team_leaderboard SET
+            creativity_sum = totals.creativity_sum,
+            engagement_sum = totals.engagement_sum,
+            collaboration_sum = totals.collaboration_sum,
+            analysis_count = totals.analysis_count
+        FROM (
+            SELECT stories.team_id,
+                   SUM(session_analyses.creativity_score) AS creativity_sum,
+                   SUM(session_analyses.engagement_score) AS engagement_sum,
+                   SUM(session_analyses.collaboration_score) AS collaboration_sum,
+                   COUNT(*) AS analysis_count
+            FROM session_analyses
+            JOIN stories ON stories.id = session_analyses.story_id
+            GROUP BY stories.team_id
+        ) AS totals
+        WHERE team_leaderboard.team_id = totals.team_id
+    """)
+
+    op.drop_column('team_leaderboard', 'avg_creativity_score')
+    op.drop_column('team_leaderboard', 'avg_engagement_score')
+    op.drop_column('team_leaderboard', 'avg_collaboration_score')
+
+
+def downgrade() -> None:
+    op.add_column('team_leaderboard', sa.Column('avg_creativity_score', sa.Float(), nullable=True))
+    op.add_column('team_leaderboard', sa.Column('avg_engagement_score', sa.Float(), nullable=True))
+    op.add_column('team_leaderboard', sa.Column('avg_collaboration_score', sa.Float(), nullable=True))
+    op.execute("""
+        UPDATE team_leaderboard SET
+            avg_creativity_score = creativity_sum::float / analysis_count,
+            avg_engagement_score = engagement_sum::float / analysis_count,
+            avg_collaboration_score = collaboration_sum::float / analysis_count
+        WHERE analysis_count > 0
+    """)
+    op.drop_column('team_leaderboard', 'analysis_count')
+    op.drop_column('team_leaderboard', 'collaboration_sum')
+    op.drop_column('team_leaderboard', 'engagement_sum')
+    op.drop_column('team_leaderboard', 'creativity_sum')
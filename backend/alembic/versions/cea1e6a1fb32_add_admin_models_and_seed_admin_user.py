@@ -11,7 +11,7 @@ import os
 import hashlib
 import uuid
 from datetime import datetime
-from passlib.context import CryptContext
+import bcrypt
 
 
 # revision identifiers, used by Alembic.
@@ -29,9 +29,8 @@ def seed_admin_user_and_token():
     admin_password = os.getenv('ADMIN_SEED_PASSWORD', 'ChangeMe123!')
     admin_token = os.getenv('ADMIN_SEED_API_TOKEN', 'dev-admin-token')
     
-    # Initialize password hasher
-    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-    password_hash = pwd_context.hash(admin_password)
+    # Hash the password
+    password_hash = bcrypt.hashpw(admin_password.encode(), bcrypt.gensalt(rounds=12)).decode()
     
     # Hash the API token
     token_hash = hashlib.sha256(admin_token.encode()).hexdigest()
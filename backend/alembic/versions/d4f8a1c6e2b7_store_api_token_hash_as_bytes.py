@@ -0,0 +1,36 @@
+"""Store API token hash as raw bytes
+
+Revision ID: d4f8a1c6e2b7
+Revises: 7b3e9d2a41c5
+Create Date: 2026-10-15 10:41:07.562914
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4f8a1c6e2b7'
+down_revision = '7b3e9d2a41c5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.alter_column(
+        'api_tokens', 'token_hash',
+        type_=sa.LargeBinary(length=32),
+        existing_type=sa.String(length=255),
+        existing_nullable=False,
+        postgresql_using="decode(token_hash, 'hex')"
+    )
+
+
+def downgrade() -> None:
+    op.alter_column(
+        'api_tokens', 'token_hash',
+        type_=sa.String(length=255),
+        existing_type=sa.LargeBinary(length=32),
+        existing_nullable=False,
+        postgresql_using="encode(token_hash, 'hex')"
+    )
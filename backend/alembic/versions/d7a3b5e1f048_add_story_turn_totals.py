@@ -0,0 +1,41 @@
+"""Add story turn totals
+
+Revision ID: d7a3b5e1f048
+Revises: c6f1a9d3e285
+Create Date: 2026-10-15 14:31:08.271945
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7a3b5e1f048'
+down_revision = 'c6f1a9d3e285'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('stories', sa.Column('total_turns', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('stories', sa.Column('twist_count', sa.Integer(), nullable=False, server_default='0'))
+    
+    # Backfill from existing turns, counting them the way the runtime
+    # increments do (total_user_turns was already backfilled in e91c3b7f5a20)
+    op.execute("""
+        UPDATE stories SET
+            total_turns = counts.total_turns,
+            twist_count = counts.twist_count
+        FROM (
+            SELECT story_id,
+                   COUNT(*) AS total_turns,
+                   COUNT(*) FILTER (WHERE is_twist) AS twist_count
+            FROM turns
+            GROUP BY story_id
+        ) AS counts
+        WHERE stories.id = counts.story_id
+    """)
+
+def downgrade() -> None:
+    op.drop_column('stories', 'twist_count')
+    op.drop_column('stories', 'total_turns')
@@ -0,0 +1,37 @@
+"""Stamp remaining creation times in database
+
+Revision ID: e2b9c7a4d561
+Revises: d7a3b5e1f048
+Create Date: 2026-10-15 14:58:12.430716
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2b9c7a4d561'
+down_revision = 'd7a3b5e1f048'
+branch_labels = None
+depends_on = None
+
+SQL_UTCNOW = sa.text("timezone('utc', statement_timestamp())")
+
+TIMESTAMP_COLUMNS = [
+    ('teams', 'created_at'),
+    ('sessions', 'started_at'),
+    ('session_analyses', 'created_at'),
+    ('users', 'created_at'),
+    ('api_tokens', 'created_at'),
+    ('admin_actions', 'created_at'),
+]
+
+
+def upgrade() -> None:
+    for table, column in TIMESTAMP_COLUMNS:
+        op.alter_column(table, column, server_default=SQL_UTCNOW, existing_type=sa.DateTime())
+
+
+def downgrade() -> None:
+    for table, column in reversed(TIMESTAMP_COLUMNS):
+        op.alter_column(table, column, server_default=None, existing_type=sa.DateTime())
@@ -0,0 +1,45 @@
+"""Add story turn counters
+
+Revision ID: e91c3b7f5a20
+Revises: d4f8a1c6e2b7
+Create Date: 2026-10-15 11:26:53.204718
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e91c3b7f5a20'
+down_revision = 'd4f8a1c6e2b7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('stories', sa.Column('turns_since_last_twist', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('stories', sa.Column('total_user_turns', sa.Integer(), nullable=False, server_default='0'))
+    
+    # Backfill from existing turns
+    op.execute("""
+        UPDATE stories SET
+            total_user_turns = (
+                SELECT COUNT(*) FROM turns
+                WHERE turns.story_id = stories.id
+                  AND turns.author_name <> 'StoryBot' AND NOT turns.is_twist
+            ),
+            turns_since_last_twist = (
+                SELECT COUNT(*) FROM turns
+                WHERE turns.story_id = stories.id
+                  AND turns.author_name <> 'StoryBot' AND NOT turns.is_twist
+                  AND turns.turn_number > (
+                      SELECT COALESCE(MAX(t.turn_number), 0) FROM turns t
+                      WHERE t.story_id = stories.id AND t.is_twist
+                  )
+            )
+    """)
+
+
+def downgrade() -> None:
+    op.drop_column('stories', 'total_user_turns')
+    op.drop_column('stories', 'turns_since_last_twist')
@@ -0,0 +1,30 @@
+"""Stamp story and turn times in the database
+
+Revision ID: f3a7c2d9b614
+Revises: e91c3b7f5a20
+Create Date: 2026-10-15 11:58:14.630952
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3a7c2d9b614'
+down_revision = 'e91c3b7f5a20'
+branch_labels = None
+depends_on = None
+
+SQL_UTCNOW = sa.text("timezone('utc', statement_timestamp())")
+
+
+def upgrade() -> None:
+    op.alter_column('stories', 'created_at', server_default=SQL_UTCNOW, existing_type=sa.DateTime())
+    op.alter_column('stories', 'started_at', server_default=SQL_UTCNOW, existing_type=sa.DateTime())
+    op.alter_column('turns', 'created_at', server_default=SQL_UTCNOW, existing_type=sa.DateTime())
+
+
+def downgrade() -> None:
+    op.alter_column('turns', 'created_at', server_default=None, existing_type=sa.DateTime())
+    op.alter_column('stories', 'started_at', server_default=None, existing_type=sa.DateTime())
+    op.alter_column('stories', 'created_at', server_default=None, existing_type=sa.DateTime())
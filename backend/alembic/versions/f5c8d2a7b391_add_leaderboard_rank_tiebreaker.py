@@ -0,0 +1,32 @@
+"""Add team code tiebreaker to leaderboard rank index
+
+Revision ID: f5c8d2a7b391
+Revises: e2b9c7a4d561
+Create Date: 2026-10-15 15:24:51.907383
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f5c8d2a7b391'
+down_revision = 'e2b9c7a4d561'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.drop_index('idx_team_leaderboard_rank', table_name='team_leaderboard')
+    op.create_index(
+        'idx_team_leaderboard_rank', 'team_leaderboard',
+        [sa.text('stories_completed DESC'), sa.text('total_turns DESC'), sa.text('team_code DESC')]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_team_leaderboard_rank', table_name='team_leaderboard')
+    op.create_index(
+        'idx_team_leaderboard_rank', 'team_leaderboard',
+        [sa.text('stories_completed DESC'), sa.text('total_turns DESC')]
+    )
@@ -0,0 +1,98 @@
+"""
+Response Cache for Story-Twister
+Short-lived Redis caching for frequently polled endpoints, plus pub/sub
+notifications that let admin live views update without polling
+"""
+
+import os
+from typing import AsyncIterator, Iterable, Optional
+
+import orjson
+from cachetools import LRUCache
+
+# Initialize Redis client if a URL is configured
+REDIS_CLIENT = None
+try:
+    from redis import asyncio as aioredis
+    from redis.exceptions import RedisError
+    redis_url = os.getenv("REDIS_URL")
+    if redis_url:
+        REDIS_CLIENT = aioredis.from_url(redis_url)
+        print("✅ Redis cache initialized")
+    else:
+        print("⚠️ REDIS_URL not found, response caching disabled")
+except ImportError:
+    RedisError = Exception
+    print("⚠️ Redis library not installed, response caching disabled")
+
+# Cache keys and TTLs for admin views polled by the dashboard
+SNAPSHOT_CACHE_KEY = "snapshot:v1"
+DASHBOARD_CACHE_KEY = "dashboard:v1"
+ADMIN_VIEW_TTL_SECONDS = 2
+
+# Session analysis responses by story id, held in process. Analyses never change
+# once written, but admin delete_session removes them along with their stories
+analysis_cache: LRUCache = LRUCache(maxsize=4096)
+
+def evict_analyses(story_ids: Iterable):
+    """Forget cached analyses for stories that were deleted"""
+    for story_id in story_ids:
+        analysis_cache.pop(story_id, None)
+
+async def cache_get(key: str) -> Optional[bytes]:
+    """Return cached bytes for key, or None on a miss or when caching is unavailable"""
+    if REDIS_CLIENT is None:
+        return None
+    try:
+        return await REDIS_CLIENT.get(key)
+    except RedisError as e:
+        print(f"Redis get error: {e}")
+        return None
+
+async def cache_set(key: str, value, ttl_seconds: int):
+    """Store value under key with a TTL"""
+    if REDIS_CLIENT is None:
+        return
+    try:
+        await REDIS_CLIENT.setex(key, ttl_seconds, value)
+    except RedisError as e:
+        print(f"Redis set error: {e}")
+
+async def cache_delete(*keys: str):
+    """Invalidate the given keys"""
+    if REDIS_CLIENT is None:
+        return
+    try:
+        await REDIS_CLIENT.delete(*keys)
+    except RedisError as e:
+        print(f"Redis delete error: {e}")
+
+def live_events_enabled() -> bool:
+    """Whether pub/sub live updates are available"""
+    return REDIS_CLIENT is not None
+
+def team_events_channel(team_id) -> str:
+    """Pub/sub channel carrying live updates for a team's stories"""
+    return f"team:{team_id}:events"
+
+async def publish_team_event(team_id, event: str, **data):
+    """Notify live-view subscribers that a team's story changed"""
+    if REDIS_CLIENT is None:
+        return
+    try:
+        payload = orjson.dumps({'event': event, **data}, default=str)
+        await REDIS_CLIENT.publish(team_events_channel(team_id), payload)
+    except RedisError as e:
+        print(f"Redis publish error: {e}")
+
+async def subscribe_team_events(team_id, keepalive_seconds: float = 15.0) -> AsyncIterator[Optional[bytes]]:
+    """Yield published payloads for a team, or None every keepalive_seconds of silence"""
+    pubsub = REDIS_CLIENT.pubsub()
+    await pubsub.subscribe(team_events_channel(team_id))
+    try:
+        while True:
+            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=keepalive_seconds)
+            yield message['data'] if message else None
+    finally:
+        await pubsub.unsubscribe()
+        await pubsub.aclose()
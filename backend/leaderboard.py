@@ -0,0 +1,140 @@
+"""
+Team Leaderboard for Story-Twister
+Aggregates per-team stats in SQL and keeps them denormalized in the
+team_leaderboard table, so leaderboard reads are a single indexed scan
+"""
+
+import uuid
+from typing import Optional
+from sqlalchemy import select, update, delete, func, Float, distinct, and_, true
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import Team, Session, Story, Turn, SessionAnalysis, TeamLeaderboard, SessionStatus, StoryStatus
+
+def leaderboard_stats_query():
+    """Per-team leaderboard stats computed in one grouped query.
+    
+    Participants, analyses and stories are each aggregated per team in their own subquery
+    so joining them doesn't multiply rows. Only teams with a completed session are
+    included, reporting their most recently started completed session.
+    """
+    # Turn totals come from the per-story counters; turns are only scanned for
+    # the distinct participant count, which idx_turns_story_author_twist covers
+    is_user_turn = and_(Turn.is_twist.is_not(True), Turn.author_name.not_in(("StoryTwister", "StoryBot")))
+    participant_stats = (
+        select(
+            Story.team_id,
+            func.count(distinct(Turn.author_name)).label('participants')
+        )
+        .join(Turn, Turn.story_id == Story.id)
+        .where(is_user_turn)
+        .group_by(Story.team_id)
+        .subquery()
+    )
+    story_stats = (
+        select(
+            Story.team_id,
+            func.count(Story.id).filter(Story.status == StoryStatus.COMPLETED).label('stories_completed'),
+            func.sum(Story.total_turns).label('total_turns'),
+            func.sum(Story.twist_count).label('twist_count'),
+            func.sum(Story.total_user_turns).label('user_turns'),
+            func.max(Story.created_at).label('last_active')
+        )
+        .group_by(Story.team_id)
+        .subquery()
+    )
+    analysis_stats = (
+        select(
+            Story.team_id,
+            func.sum(SessionAnalysis.creativity_score).label('creativity_sum'),
+            func.sum(SessionAnalysis.engagement_score).label('engagement_sum'),
+            func.sum(SessionAnalysis.collaboration_score).label('collaboration_sum'),
+            func.count(SessionAnalysis.id).label('analysis_count')
+        )
+        .join(SessionAnalysis, SessionAnalysis.story_id == Story.id)
+        .group_by(Story.team_id)
+        .subquery()
+    )
+    # Each team's most recently started completed session, fetched per team with
+    # ORDER BY ... LIMIT 1 rather than scanning every session
+    latest_session = (
+        select(Session.status, Session.ended_at)
+        .where(Session.team_id == Team.id, Session.status == SessionStatus.COMPLETED)
+        .order_by(Session.started_at.desc())
+        .limit(1)
+        .lateral('latest_session')
+    )
+    return (
+        select(
+            Team.id.label('team_id'),
+            Team.code.label('team_code'),
+            Team.name.label('team_name'),
+            func.coalesce(participant_stats.c.participants, 0).label('participants'),
+            func.coalesce(story_stats.c.stories_completed, 0).label('stories_completed'),
+            func.coalesce(story_stats.c.total_turns, 0).label('total_turns'),
+            func.coalesce(story_stats.c.twist_count, 0).label('twist_count'),
+            func.coalesce(story_stats.c.user_turns, 0).label('user_turns'),
+            func.coalesce(analysis_stats.c.creativity_sum, 0).label('creativity_sum'),
+            func.coalesce(analysis_stats.c.engagement_sum, 0).label('engagement_sum'),
+            func.coalesce(analysis_stats.c.collaboration_sum, 0).label('collaboration_sum'),
+            func.coalesce(analysis_stats.c.analysis_count, 0).label('analysis_count'),
+            story_stats.c.last_active,
+            latest_session.c.status.label('session_status'),
+            latest_session.c.ended_at.label('session_ended_at')
+        )
+        # Inner join: teams without a completed session are left off the leaderboard
+        .join(latest_session, true())
+        .outerjoin(story_stats, story_stats.c.team_id == Team.id)
+        .outerjoin(participant_stats, participant_stats.c.team_id == Team.id)
+        .outerjoin(analysis_stats, analysis_stats.c.team_id == Team.id)
+    )
+
+async def refresh_team_leaderboard(db: AsyncSession, team_id: Optional[uuid.UUID] = None):
+    """Recompute leaderboard rows for one team (or every team when team_id is None).
+    
+    Runs inside the caller's transaction; the caller commits.
+    """
+    # Teams can drop off the leaderboard (e.g. their sessions were deleted), so
+    # clear the rows being recomputed before upserting the fresh stats
+    stats = leaderboard_stats_query()
+    stale_rows = delete(TeamLeaderboard)
+    if team_id is not None:
+        # Postgres pushes this filter down into the grouped subqueries
+        stats = stats.where(Team.id == team_id)
+        stale_rows = stale_rows.where(TeamLeaderboard.team_id == team_id)
+    await db.execute(stale_rows)
+    
+    columns = list(stats.selected_columns.keys())
+    upsert = pg_insert(TeamLeaderboard).from_select(columns, stats)
+    upsert = upsert.on_conflict_do_update(
+        index_elements=[TeamLeaderboard.team_id],
+        set_={
+            **{name: upsert.excluded[name] for name in columns if name != 'team_id'},
+            'updated_at': func.timezone('utc', func.now())
+        }
+    )
+    await db.execute(upsert)
+
+async def add_analysis_to_leaderboard(db: AsyncSession, team_id: uuid.UUID, analysis: SessionAnalysis):
+    """Fold a newly inserted analysis into its team's running score totals.
+    
+    Constant-time alternative to refresh_team_leaderboard() for the one stat an
+    analysis changes. Teams without a leaderboard row yet are skipped; their
+    totals are computed when the row is first built. The caller commits.
+    """
+    await db.execute(
+        update(TeamLeaderboard)
+        .where(TeamLeaderboard.team_id == team_id)
+        .values(
+            creativity_sum=TeamLeaderboard.creativity_sum + analysis.creativity_score,
+            engagement_sum=TeamLeaderboard.engagement_sum + analysis.engagement_score,
+            collaboration_sum=TeamLeaderboard.collaboration_sum + analysis.collaboration_score,
+            analysis_count=TeamLeaderboard.analysis_count + 1,
+            updated_at=func.timezone('utc', func.now())
+        )
+    )
+
+def average_score(score_sum):
+    """Average of a running score total, or NULL when the team has no analyses"""
+    return score_sum.cast(Float) / func.nullif(TeamLeaderboard.analysis_count, 0)
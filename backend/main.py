@@ -1,32 +1,59 @@
 from datetime import datetime, timedelta
+import asyncio
 import uuid
-from uuid import UUID
 import os
 import random
 import re
-from typing import List, Optional
-from fastapi import FastAPI, HTTPException, Depends, Header
+import time
+import hashlib
+import base64
+import orjson
+from collections import Counter, deque
+from contextlib import asynccontextmanager
+from itertools import chain
+from cachetools import LRUCache
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential_jitter
+import httpx
+from typing import AsyncIterator, List, Optional
+from fastapi import FastAPI, HTTPException, Depends, Header, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, desc
-from sqlalchemy.orm import selectinload
-from database import get_db
-from models import Team, Session, Story, Turn, SessionAnalysis, SessionStatus, StoryStatus
+from sqlalchemy import select, insert, update, func, desc, case, tuple_
+from sqlalchemy.orm import selectinload, load_only
+from database import get_db, async_session
+from models import Team, Session, Story, Turn, SessionAnalysis, TeamLeaderboard, SessionStatus, StoryStatus
+from leaderboard import refresh_team_leaderboard, add_analysis_to_leaderboard, average_score
+from teams import CachedTeam, cache_team, cached_team, get_team_by_code
 from pydantic import BaseModel
 
 # Import admin router
-from admin_router import router as admin_router
-from admin_security import limiter
+from admin_router import router as admin_router, sql_utcnow
+from admin_security import (
+    limiter, run_audit_writer, run_auth_audit_aggregator,
+    flush_authentication_counts, stop_audit_writer
+)
+from cache import publish_team_event, analysis_cache
 from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 
 # Initialize Groq client if API key is available
 GROQ_CLIENT = None
+GROQ_HTTP_CLIENT = None
+GROQ_TRANSIENT_ERRORS = ()
 try:
-    from groq import Groq
+    from groq import AsyncGroq, APIConnectionError, RateLimitError, InternalServerError
+    # Rate limits, 5xx responses and dropped connections are worth retrying
+    GROQ_TRANSIENT_ERRORS = (APIConnectionError, RateLimitError, InternalServerError)
     groq_api_key = os.getenv("GROQ_API_KEY")
     if groq_api_key:
-        GROQ_CLIENT = Groq(api_key=groq_api_key)
+        # Shared keep-alive HTTP/2 pool so twist calls skip the TCP/TLS handshake
+        GROQ_HTTP_CLIENT = httpx.AsyncClient(
+            http2=True,
+            timeout=httpx.Timeout(30.0, connect=5.0),
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=20)
+        )
+        GROQ_CLIENT = AsyncGroq(api_key=groq_api_key, http_client=GROQ_HTTP_CLIENT)
         print("✅ Groq client initialized")
     else:
         print("⚠️ GROQ_API_KEY not found, using fallback twists")
@@ -34,7 +61,7 @@ except ImportError:
     print("⚠️ Groq library not installed, using fallback twists")
 
 # Arabic starter prompts for traditional storytelling
-ARABIC_STARTER_PROMPTS = [
+ARABIC_STARTER_PROMPTS = (
     "كان يامكان في قديم الزمان وسالف العصر والآوان، كان هناك شاب يدعى أحمد يعيش في قرية صغيرة على ضفاف النهر...",
     "كان يامكان في قديم الزمان وسالف العصر والآوان، كانت هناك أميرة جميلة تسكن في قصر عالٍ محاط بالحدائق الساحرة...",
     "كان يامكان في قديم الزمان وسالف العصر والآوان، كان هناك تاجر حكيم يسافر عبر الصحراء الشاسعة...",
@@ -43,10 +70,10 @@ ARABIC_STARTER_PROMPTS = [
     "كان يامكان في قديم الزمان وسالف العصر والآوان، كان هناك حكيم عجوز يسكن في كهف على قمة الجبل...",
     "كان يامكان في قديم الزمان وسالف العصر والآوان، كانت هناك فتاة ذكية تحب قراءة الكتب القديمة...",
     "كان يامكان في قديم الزمان وسالف العصر والآوان، كان هناك ملك عادل يحكم مملكة واسعة بالحكمة والعدل..."
-]
+)
 
 # English starter prompts for traditional storytelling
-ENGLISH_STARTER_PROMPTS = [
+ENGLISH_STARTER_PROMPTS = (
     "Once upon a time, in a land far, far away, there lived a young adventurer named Alex who dreamed of exploring distant kingdoms...",
     "In the days of old, when magic still flowed through the world, there was a beautiful princess who lived in a tall castle surrounded by enchanted gardens...",
     "Long ago, in times forgotten, there was a wise merchant who traveled across vast deserts in search of rare treasures...",
@@ -55,11 +82,65 @@ ENGLISH_STARTER_PROMPTS = [
     "Once upon a time, there was an old sage who lived in a cave atop the highest mountain...",
     "Long ago, there was a clever young woman who loved reading ancient books and solving mysteries...",
     "In the olden days, there was a just king who ruled a vast kingdom with wisdom and fairness..."
-]
+)
+
+# Fallback twists used when no Groq client is configured
+ARABIC_FALLBACK_TWISTS = (
+    "🌪️ وفجأة، ظهر من العدم رجل غامض يحمل مفتاحاً ذهبياً...",
+    "🌪️ وإذا بالأرض تهتز وتنفتح عن كنز مدفون منذ قرون...",
+    "🌪️ وفي تلك اللحظة، سمع صوتاً يناديه من السماء...",
+    "🌪️ وبينما كان يمشي، رأى ضوءاً ساطعاً يخرج من الغابة...",
+    "🌪️ وفجأة، تحول كل شيء حوله إلى ذهب خالص..."
+)
+ENGLISH_FALLBACK_TWISTS = (
+    "🌪️ Suddenly, a mysterious figure emerged from the shadows carrying a golden key...",
+    "🌪️ At that moment, the ground began to shake and revealed a hidden treasure...",
+    "🌪️ Just then, a voice called out from the heavens above...",
+    "🌪️ As they walked, a brilliant light appeared from the forest...",
+    "🌪️ Suddenly, everything around them turned to pure gold..."
+)
+
+# Fallback twists used when the Groq call fails
+ARABIC_ERROR_FALLBACK_TWISTS = (
+    "🌪️ وفجأة، ظهر من العدم رجل غامض يحمل مفتاحاً ذهبياً...",
+    "🌪️ وإذا بالأرض تهتز وتنفتح عن كنز مدفون منذ قرون...",
+    "🌪️ وفي تلك اللحظة، سمع صوتاً يناديه من السماء..."
+)
+ENGLISH_ERROR_FALLBACK_TWISTS = (
+    "🌪️ Suddenly, a mysterious figure emerged from the shadows...",
+    "🌪️ At that moment, the ground began to shake and revealed a hidden secret...",
+    "🌪️ Just then, a voice called out from somewhere unexpected..."
+)
+
+# Private RNG for picking prompts and fallbacks, separate from the global random state
+_rng = random.Random()
 
 # Session duration in seconds (10 minutes)
 SESSION_DURATION_SECONDS = 10 * 60  # 10 minutes - fully tested and verified
 
+def story_elapsed_seconds():
+    """Seconds since a story's timer started, computed by the database"""
+    return func.extract('epoch', sql_utcnow() - Story.started_at)
+
+async def complete_expired_story(db: AsyncSession, story_id):
+    """Mark a timed-out story completed; only still-active rows are updated, so
+    concurrent requests racing on the same story write it at most once.
+    The request that completes it also refreshes the team's leaderboard row."""
+    result = await db.execute(
+        update(Story)
+        .where(Story.id == story_id, Story.status == StoryStatus.ACTIVE)
+        .values(status=StoryStatus.COMPLETED)
+        .returning(Story.team_id)
+    )
+    team_id = result.scalar_one_or_none()
+    if team_id is not None:
+        await refresh_team_leaderboard(db, team_id)
+    await db.commit()
+
+# Arabic script block and basic Latin letters, used by detect_language
+_ARABIC_CHAR_RE = re.compile(r'[\u0600-\u06FF]')
+_ENGLISH_CHAR_RE = re.compile(r'[a-zA-Z]')
+
 def detect_language(text: str) -> str:
     """
     Detect if text is primarily Arabic or English
@@ -69,12 +150,12 @@ def detect_language(text: str) -> str:
         return 'en'
     
     # Count Arabic characters (Unicode range for Arabic script)
-    arabic_chars = len(re.findall(r'[\u0600-\u06FF]', text))
+    arabic_chars = len(_ARABIC_CHAR_RE.findall(text))
     # Count English characters (basic Latin alphabet)
-    english_chars = len(re.findall(r'[a-zA-Z]', text))
+    english_chars = len(_ENGLISH_CHAR_RE.findall(text))
     
     # If more than 30% Arabic characters, consider it Arabic
-    total_chars = len(text.replace(' ', '').replace('\n', '').replace('\t', ''))
+    total_chars = len(text) - text.count(' ') - text.count('\n') - text.count('\t')
     if total_chars == 0:
         return 'en'
     
@@ -95,12 +176,49 @@ app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 # Mount admin router with security
 app.include_router(admin_router)
 
+# Admin audit rows are written in batches by background tasks
+@app.on_event("startup")
+async def start_audit_writer():
+    app.state.audit_tasks = [
+        asyncio.create_task(run_audit_writer()),
+        asyncio.create_task(run_auth_audit_aggregator())
+    ]
+
+@app.on_event("startup")
+async def rebuild_leaderboard():
+    # Catch up on anything that changed without a refresh (e.g. rows written before
+    # expiring stories refreshed their team's row)
+    try:
+        async with async_session() as db:
+            await refresh_team_leaderboard(db)
+            await db.commit()
+    except Exception as e:
+        print(f"⚠️ Failed to rebuild leaderboard: {e}")
+
+@app.on_event("shutdown")
+async def stop_audit_tasks():
+    writer, aggregator = app.state.audit_tasks
+    aggregator.cancel()
+    flush_authentication_counts()
+    await stop_audit_writer(writer)
+
+@app.on_event("shutdown")
+async def close_groq_http_client():
+    if GROQ_HTTP_CLIENT is not None:
+        await GROQ_HTTP_CLIENT.aclose()
+
 # Debug logging
 print("🚀 Starting Story Twister API...")
 print(f"📡 GROQ_CLIENT available: {GROQ_CLIENT is not None}")
 print("🔐 Admin router mounted at /api/v1/admin")
 
 # CORS middleware for frontend communication
+# Request headers the frontends actually send, instead of echoing any header back
+CORS_ALLOWED_HEADERS = [
+    "Content-Type", "Accept", "Cache-Control", "Pragma", "Authorization",
+    "X-Event-Mode", "X-Nickname", "X-Team-Code", "X-Event-Session", "X-Admin-Token"
+]
+
 print("🌐 Setting up CORS middleware...")
 app.add_middleware(
     CORSMiddleware,
@@ -110,15 +228,20 @@ app.add_middleware(
     ],
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS", "HEAD"],
-    allow_headers=["*"],
-    expose_headers=["*"],
+    allow_headers=CORS_ALLOWED_HEADERS,
+    expose_headers=["Content-Disposition"],
 )
 print("✅ CORS middleware configured")
 
+# Routes whose responses never need cache-busting headers
+_NO_CACHE_EXEMPT = frozenset({"/health", "/debug/routes", "/api/v1/debug/test"})
+
 # Add cache-busting middleware to force fresh requests
 @app.middleware("http")
 async def add_cache_headers(request, call_next):
     response = await call_next(request)
+    if request.url.path in _NO_CACHE_EXEMPT:
+        return response
     response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
     response.headers["Pragma"] = "no-cache"
     response.headers["Expires"] = "0"
@@ -212,18 +335,17 @@ async def join_session(
     nickname = headers["nickname"]
     
     # Find or create team
-    result = await db.execute(select(Team).where(Team.code == team_code))
-    team = result.scalar_one_or_none()
+    team = await get_team_by_code(db, team_code)
     
     if not team:
-        team = Team(
+        new_team = Team(
             id=uuid.uuid4(),
             code=team_code,
-            name=f"Team {team_code}",
-            created_at=datetime.utcnow()
+            name=f"Team {team_code}"
         )
-        db.add(team)
+        db.add(new_team)
         await db.flush()
+        team = CachedTeam(new_team.id, new_team.name, new_team.created_at)
     
     # Find existing session for this team
     result = await db.execute(
@@ -244,13 +366,13 @@ async def join_session(
         session = Session(
             id=uuid.uuid4(),
             team_id=team.id,
-            started_at=datetime.utcnow(),
             status=SessionStatus.ACTIVE
         )
         db.add(session)
         await db.flush()
     
     await db.commit()
+    cache_team(team_code, team)
     
     # Mock members count (in real app, track active members)
     members_count = 3
@@ -258,7 +380,7 @@ async def join_session(
     return SessionJoinResponse(
         team={
             "id": str(team.id),
-            "code": team.code,
+            "code": team_code,
             "name": team.name,
             "created_at": team.created_at.isoformat()
         },
@@ -280,18 +402,20 @@ async def get_stories(
     headers: dict = Depends(get_event_headers)
 ):
     """Get stories with optional filters"""
-    query = select(Story)
+    # Only load the columns StoryResponse needs
+    query = select(Story).options(load_only(
+        Story.id, Story.title, Story.initial_prompt,
+        Story.current_turn, Story.status, Story.created_at
+    ))
     
     if team_code:
-        # Look up team by code first, then filter by team_id
-        team_query = select(Team).where(Team.code == team_code)
-        team_result = await db.execute(team_query)
-        team = team_result.scalar_one_or_none()
-        if team:
+        team = cached_team(team_code)
+        if team is not None:
             query = query.where(Story.team_id == team.id)
         else:
-            # No team found with this code, return empty list
-            return []
+            # Join on the team code so the lookup and the fetch are one statement;
+            # an unknown code simply matches no stories
+            query = query.join(Team, Story.team_id == Team.id).where(Team.code == team_code)
     elif team_id:
         # Direct UUID lookup (for backward compatibility)
         try:
@@ -331,8 +455,7 @@ async def create_story(
     team_code = headers["team_code"]
     
     # Find team
-    result = await db.execute(select(Team).where(Team.code == team_code))
-    team = result.scalar_one_or_none()
+    team = await get_team_by_code(db, team_code)
     
     if not team:
         raise HTTPException(status_code=404, detail="Team not found")
@@ -344,21 +467,19 @@ async def create_story(
         # Detect language from story title to choose appropriate starter prompt
         detected_lang = detect_language(story_data.title)
         if detected_lang == 'ar':
-            starter_prompt = random.choice(ARABIC_STARTER_PROMPTS)
+            starter_prompt = _rng.choice(ARABIC_STARTER_PROMPTS)
         else:
-            starter_prompt = random.choice(ENGLISH_STARTER_PROMPTS)
+            starter_prompt = _rng.choice(ENGLISH_STARTER_PROMPTS)
     
-    # Create story with timer start
-    now = datetime.utcnow()
+    # Create story; the database stamps created_at/started_at, starting the timer
     story = Story(
         id=uuid.uuid4(),
         team_id=team.id,
         title=story_data.title,
         initial_prompt=starter_prompt,
         current_turn=1,
-        status=StoryStatus.ACTIVE,
-        created_at=now,
-        started_at=now
+        total_turns=1,
+        status=StoryStatus.ACTIVE
     )
     db.add(story)
     await db.flush()
@@ -370,8 +491,7 @@ async def create_story(
         author_name="StoryBot",
         content=starter_prompt,
         is_twist=False,
-        turn_number=1,
-        created_at=now
+        turn_number=1
     )
     db.add(first_turn)
     
@@ -388,18 +508,22 @@ async def create_story(
 
 @app.get("/api/v1/stories/{story_id}/turns")
 async def get_story_turns(
-    story_id: str,
+    story_id: uuid.UUID,
     db: AsyncSession = Depends(get_db),
     headers: dict = Depends(get_event_headers)
 ):
     """Get all turns for a story"""
+    # Query the turns directly, ordered by the (story_id, turn_number) index
     result = await db.execute(
-        select(Story).options(selectinload(Story.turns)).where(Story.id == uuid.UUID(story_id))
+        select(Turn).where(Turn.story_id == story_id).order_by(Turn.turn_number)
     )
-    story = result.scalar_one_or_none()
+    turns = result.scalars().all()
     
-    if not story:
-        raise HTTPException(status_code=404, detail="Story not found")
+    # Only a story without turns needs a separate existence check
+    if not turns:
+        story_exists = await db.scalar(select(Story.id).where(Story.id == story_id))
+        if not story_exists:
+            raise HTTPException(status_code=404, detail="Story not found")
     
     return [
         TurnResponse(
@@ -411,7 +535,7 @@ async def get_story_turns(
             turn_number=turn.turn_number,
             created_at=turn.created_at
         )
-        for turn in sorted(story.turns, key=lambda t: t.turn_number)
+        for turn in turns
     ]
 
 @app.post("/api/v1/stories/add-sentence")
@@ -430,162 +554,335 @@ async def add_sentence(
         print(f"❌ Invalid story ID format: {request.story_id}")
         raise HTTPException(status_code=400, detail=f"Invalid story ID format: {request.story_id}")
     
-    result = await db.execute(select(Story).where(Story.id == story_uuid))
-    story = result.scalar_one_or_none()
+    result = await db.execute(
+        select(Story, story_elapsed_seconds()).where(Story.id == story_uuid)
+    )
+    row = result.first()
     
-    if not story:
+    if not row:
         print(f"❌ Story not found: {request.story_id}")
         raise HTTPException(status_code=404, detail=f"Story not found: {request.story_id}")
+    story, elapsed_seconds = row
     
     # Check if session time has expired
-    now = datetime.utcnow()
-    elapsed_seconds = (now - story.started_at).total_seconds()
     if elapsed_seconds >= SESSION_DURATION_SECONDS:
-        story.status = StoryStatus.COMPLETED
-        await db.commit()
+        await complete_expired_story(db, story.id)
         raise HTTPException(status_code=400, detail="Session has ended")
     
     if story.status != StoryStatus.ACTIVE:
         raise HTTPException(status_code=400, detail="Story is not active")
     
-    # Create new turn
-    new_turn_number = story.current_turn + 1
-    turn = Turn(
+    # Claim the turn number and update the counters in the UPDATE itself, since
+    # other turns may land concurrently. Reaching 2 user turns since the last
+    # twist resets the counter here, so exactly one request claims each auto-twist
+    user_turns_since_twist = Story.turns_since_last_twist + 1
+    result = await db.execute(
+        update(Story)
+        .where(Story.id == story.id, Story.status == StoryStatus.ACTIVE)
+        .values(
+            current_turn=Story.current_turn + 1,
+            total_user_turns=Story.total_user_turns + 1,
+            total_turns=Story.total_turns + 1,
+            turns_since_last_twist=case((user_turns_since_twist >= 2, 0), else_=user_turns_since_twist)
+        )
+        .returning(Story.current_turn, Story.turns_since_last_twist)
+    )
+    claimed = result.first()
+    if claimed is None:
+        raise HTTPException(status_code=400, detail="Story is not active")
+    new_turn_number, turns_since_last_twist = claimed
+    
+    await db.execute(insert(Turn).values(
         id=uuid.uuid4(),
         story_id=story.id,
         author_name=nickname,
         content=request.content,
         is_twist=False,
-        turn_number=new_turn_number,
-        created_at=datetime.utcnow()
-    )
-    db.add(turn)
+        turn_number=new_turn_number
+    ))
     
-    # Update story current turn
-    story.current_turn = new_turn_number
+    twist_due = turns_since_last_twist == 0
+    if twist_due:
+        # Generate story content for AI twist
+        result = await db.execute(
+            select(Turn.content).where(Turn.story_id == story.id).order_by(Turn.turn_number)
+        )
+        story_content = "\n".join(result.scalars().all())
     
+    # Commit before calling Groq, so the sentence is visible right away and no
+    # transaction stays open while the twist is generated
     await db.commit()
+    await publish_team_event(story.team_id, 'turn_added', story_id=story.id, turn_number=new_turn_number)
+    
+    if not twist_due:
+        return {"message": "Sentence added successfully", "turn_number": new_turn_number}
+    
+    print("🌪️ Auto-triggering twist after 2 user turns")
+    twist_content = await generate_ai_twist(story_content)
     
-    # Check if we need to auto-trigger a twist (after 2 user turns)
-    # Count user turns since last twist
+    # Claim the twist's turn number at write time, after the turns that
+    # landed while it was being generated
     result = await db.execute(
-        select(Turn).where(Turn.story_id == story.id).order_by(Turn.turn_number)
+        update(Story)
+        .where(Story.id == story.id)
+        .values(
+            current_turn=Story.current_turn + 1,
+            total_turns=Story.total_turns + 1,
+            twist_count=Story.twist_count + 1,
+            turns_since_last_twist=0
+        )
+        .returning(Story.current_turn)
     )
-    all_turns = result.scalars().all()
+    twist_turn_number = result.scalar_one()
+    await db.execute(insert(Turn).values(
+        id=uuid.uuid4(),
+        story_id=story.id,
+        author_name="StoryBot",
+        content=twist_content,
+        is_twist=True,
+        turn_number=twist_turn_number
+    ))
     
-    # Find last twist index
-    last_twist_index = -1
-    for i, turn in enumerate(all_turns):
-        if turn.is_twist:
-            last_twist_index = i
-    
-    # Count user turns since last twist
-    user_turns_since_twist = 0
-    turns_to_check = all_turns[last_twist_index + 1:] if last_twist_index >= 0 else all_turns
-    for turn in turns_to_check:
-        if turn.author_name != "StoryBot" and not turn.is_twist:
-            user_turns_since_twist += 1
-    
-    # Auto-trigger twist if we have 2 or more user turns since last twist
-    if user_turns_since_twist >= 2:
-        print(f"🌪️ Auto-triggering twist after {user_turns_since_twist} user turns")
-        
-        # Generate story content for AI twist
-        story_content = "\n".join([turn.content for turn in all_turns])
-        twist_content = await generate_ai_twist(story_content)
-        
-        # Create twist turn
-        twist_turn_number = story.current_turn + 1
-        twist_turn = Turn(
-            id=uuid.uuid4(),
-            story_id=story.id,
-            author_name="StoryBot",
-            content=twist_content,
-            is_twist=True,
-            turn_number=twist_turn_number,
-            created_at=datetime.utcnow()
-        )
-        db.add(twist_turn)
-        
-        # Update story current turn
-        story.current_turn = twist_turn_number
-        
-        await db.commit()
-        
-        return {"message": "Sentence added and twist triggered", "turn_number": new_turn_number, "twist_added": True}
+    await db.commit()
+    await publish_team_event(story.team_id, 'turn_added', story_id=story.id, turn_number=twist_turn_number)
     
-    return {"message": "Sentence added successfully", "turn_number": new_turn_number}
+    return {"message": "Sentence added and twist triggered", "turn_number": new_turn_number, "twist_added": True}
 
-async def generate_ai_twist(story_content: str) -> str:
-    """Generate an AI twist using Mistral Saba 24B model, detecting language from story content"""
-    # Detect the primary language of the story content
-    detected_lang = detect_language(story_content)
+class GroqLimiter:
+    """
+    Proactive pacing for Groq calls
+    Caps concurrency and keeps requests/tokens inside a sliding one-minute window.
+    The token budget follows Groq's x-ratelimit-* headers: halved on a 429 and
+    grown back additively on success (AIMD).
+    """
     
-    if not GROQ_CLIENT:
-        # Language-specific fallback twists
-        if detected_lang == 'ar':
-            arabic_fallbacks = [
-                "🌪️ وفجأة، ظهر من العدم رجل غامض يحمل مفتاحاً ذهبياً...",
-                "🌪️ وإذا بالأرض تهتز وتنفتح عن كنز مدفون منذ قرون...",
-                "🌪️ وفي تلك اللحظة، سمع صوتاً يناديه من السماء...",
-                "🌪️ وبينما كان يمشي، رأى ضوءاً ساطعاً يخرج من الغابة...",
-                "🌪️ وفجأة، تحول كل شيء حوله إلى ذهب خالص..."
-            ]
-            return random.choice(arabic_fallbacks)
+    WINDOW_SECONDS = 60.0
+    
+    def __init__(self, max_concurrency: int, requests_per_minute: int, tokens_per_minute: int):
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._lock = asyncio.Lock()
+        self._window = deque()  # (monotonic timestamp, estimated tokens)
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.token_limit = tokens_per_minute
+    
+    @asynccontextmanager
+    async def acquire(self, estimated_tokens: int):
+        async with self._semaphore:
+            await self._reserve(estimated_tokens)
+            yield
+    
+    async def _reserve(self, estimated_tokens: int):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                while self._window and now - self._window[0][0] >= self.WINDOW_SECONDS:
+                    self._window.popleft()
+                used_tokens = sum(tokens for _, tokens in self._window)
+                if not self._window or (
+                    len(self._window) < self.requests_per_minute
+                    and used_tokens + estimated_tokens <= self.tokens_per_minute
+                ):
+                    self._window.append((now, estimated_tokens))
+                    return
+                # Wait for the oldest call to leave the window
+                await asyncio.sleep(self.WINDOW_SECONDS - (now - self._window[0][0]))
+    
+    def observe(self, headers, rate_limited: bool = False):
+        """Adjust the token budget from a Groq response"""
+        try:
+            self.token_limit = int(headers.get('x-ratelimit-limit-tokens', self.token_limit))
+            remaining_tokens = headers.get('x-ratelimit-remaining-tokens')
+        except ValueError:
+            remaining_tokens = None
+        
+        if rate_limited:
+            self.tokens_per_minute = max(1, self.tokens_per_minute // 2)
         else:
-            english_fallbacks = [
-                "🌪️ Suddenly, a mysterious figure emerged from the shadows carrying a golden key...",
-                "🌪️ At that moment, the ground began to shake and revealed a hidden treasure...",
-                "🌪️ Just then, a voice called out from the heavens above...",
-                "🌪️ As they walked, a brilliant light appeared from the forest...",
-                "🌪️ Suddenly, everything around them turned to pure gold..."
-            ]
-            return random.choice(english_fallbacks)
-    
+            self.tokens_per_minute = min(self.token_limit, self.tokens_per_minute + self.token_limit // 20)
+        
+        # Never plan for more than the server says is left in this window
+        if remaining_tokens is not None and remaining_tokens.isdigit():
+            used_tokens = sum(tokens for _, tokens in self._window)
+            self.tokens_per_minute = min(self.tokens_per_minute, used_tokens + int(remaining_tokens))
+
+GROQ_LIMITER = GroqLimiter(
+    max_concurrency=int(os.getenv("GROQ_MAX_CONCURRENCY", "5")),
+    requests_per_minute=int(os.getenv("GROQ_REQUESTS_PER_MINUTE", "30")),
+    tokens_per_minute=int(os.getenv("GROQ_TOKENS_PER_MINUTE", "6000"))
+)
+
+# Recent Groq completions keyed by a digest of the prompt, so retried or
+# duplicate requests for the same story don't pay for another LLM call
+_groq_completion_cache: LRUCache = LRUCache(maxsize=512)
+
+_groq_backoff = wait_exponential_jitter(initial=0.5, max=8)
+
+def _groq_retry_wait(retry_state) -> float:
+    """Honour Groq's retry-after header when present, otherwise back off exponentially"""
+    error = retry_state.outcome.exception()
+    response = getattr(error, 'response', None)
+    retry_after = response.headers.get('retry-after') if response is not None else None
     try:
-        # Create language-specific prompt for Mistral Saba 24B
-        if detected_lang == 'ar':
-            prompt = f"""أنت مساعد إبداعي لكتابة القصص باللغة العربية. بناءً على مقطع القصة التالي، اكتب جملة واحدة تحتوي على منعطف درامي مفاجئ يغير مجرى القصة. يجب أن يكون المنعطف غير متوقع ولكن منطقي ضمن سياق القصة.
+        return min(float(retry_after), 8.0)
+    except (TypeError, ValueError):
+        return _groq_backoff(retry_state)
+
+@retry(
+    stop=stop_after_attempt(4),
+    wait=_groq_retry_wait,
+    retry=retry_if_exception(lambda e: isinstance(e, GROQ_TRANSIENT_ERRORS)),
+    reraise=True
+)
+async def _create_groq_completion(prompt: str, max_tokens: int, temperature: float, idempotency_key: str, json_mode: bool = False):
+    # Rough token estimate: ~4 characters per prompt token plus the completion budget
+    estimated_tokens = len(prompt) // 4 + max_tokens
+    # JSON mode constrains the model to emit a single JSON object
+    response_format = {"response_format": {"type": "json_object"}} if json_mode else {}
+    async with GROQ_LIMITER.acquire(estimated_tokens):
+        try:
+            raw_response = await GROQ_CLIENT.chat.completions.with_raw_response.create(
+                messages=[{"role": "user", "content": prompt}],
+                model="mistral-saba-24b",
+                max_tokens=max_tokens,
+                temperature=temperature,
+                extra_headers={"Idempotency-Key": idempotency_key},
+                **response_format
+            )
+        except Exception as e:
+            response = getattr(e, 'response', None)
+            if response is not None:
+                GROQ_LIMITER.observe(response.headers, rate_limited=response.status_code == 429)
+            raise
+    GROQ_LIMITER.observe(raw_response.headers)
+    return raw_response.parse()
+
+async def groq_completion(prompt: str, max_tokens: int, temperature: float, json_mode: bool = False) -> str:
+    """Return the Mistral Saba completion for a prompt, reusing cached results.
+    
+    With json_mode the completion is a JSON object; the prompt must ask for JSON.
+    Transient Groq errors are retried up to 4 attempts before the error propagates
+    to the caller's fallback handling.
+    """
+    cache_key = hashlib.blake2b(prompt.encode(), digest_size=16).hexdigest()
+    cached = _groq_completion_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
+    response = await _create_groq_completion(prompt, max_tokens, temperature, cache_key, json_mode)
+    content = response.choices[0].message.content.strip()
+    _groq_completion_cache[cache_key] = content
+    return content
+
+async def groq_completion_stream(prompt: str, max_tokens: int, temperature: float) -> AsyncIterator[str]:
+    """Yield the Mistral Saba completion for a prompt as it is generated.
+    
+    A cached completion is yielded whole, and a fully streamed one is cached for
+    groq_completion too. Not retried: a retry after partial output would repeat text.
+    """
+    cache_key = hashlib.blake2b(prompt.encode(), digest_size=16).hexdigest()
+    cached = _groq_completion_cache.get(cache_key)
+    if cached is not None:
+        yield cached
+        return
+    
+    parts = []
+    async with GROQ_LIMITER.acquire(len(prompt) // 4 + max_tokens):
+        try:
+            stream = await GROQ_CLIENT.chat.completions.create(
+                messages=[{"role": "user", "content": prompt}],
+                model="mistral-saba-24b",
+                max_tokens=max_tokens,
+                temperature=temperature,
+                stream=True,
+                extra_headers={"Idempotency-Key": cache_key}
+            )
+        except Exception as e:
+            response = getattr(e, 'response', None)
+            if response is not None:
+                GROQ_LIMITER.observe(response.headers, rate_limited=response.status_code == 429)
+            raise
+        async for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                parts.append(delta)
+                yield delta
+    _groq_completion_cache[cache_key] = "".join(parts).strip()
+
+def _twist_prompt(story_content: str, detected_lang: str) -> str:
+    """Language-specific twist prompt for Mistral Saba 24B"""
+    if detected_lang == 'ar':
+        return f"""أنت مساعد إبداعي لكتابة القصص باللغة العربية. بناءً على مقطع القصة التالي، اكتب جملة واحدة تحتوي على منعطف درامي مفاجئ يغير مجرى القصة. يجب أن يكون المنعطف غير متوقع ولكن منطقي ضمن سياق القصة.
 
 القصة حتى الآن:
 {story_content}
 
 اكتب فقط جملة المنعطف باللغة العربية (بدون علامات اقتباس أو تفسيرات):"""
-        else:
-            prompt = f"""You are a creative storytelling assistant. Given the following story excerpt, generate a single dramatic plot twist sentence that would surprise readers and change the direction of the story. The twist should be unexpected but logical within the story context.
+    else:
+        return f"""You are a creative storytelling assistant. Given the following story excerpt, generate a single dramatic plot twist sentence that would surprise readers and change the direction of the story. The twist should be unexpected but logical within the story context.
 
 Story so far:
 {story_content}
 
 Generate only the twist sentence in English (no quotes, no explanations):"""
 
-        response = GROQ_CLIENT.chat.completions.create(
-            messages=[{"role": "user", "content": prompt}],
-            model="mistral-saba-24b",
-            max_tokens=150,
-            temperature=0.8
-        )
-        
-        twist = response.choices[0].message.content.strip()
+async def generate_ai_twist(story_content: str) -> str:
+    """Generate an AI twist using Mistral Saba 24B model, detecting language from story content"""
+    # Detect the primary language of the story content
+    detected_lang = detect_language(story_content)
+    
+    if not GROQ_CLIENT:
+        # Language-specific fallback twists
+        if detected_lang == 'ar':
+            return _rng.choice(ARABIC_FALLBACK_TWISTS)
+        return _rng.choice(ENGLISH_FALLBACK_TWISTS)
+    
+    try:
+        twist = await groq_completion(_twist_prompt(story_content, detected_lang), max_tokens=150, temperature=0.8)
         return f"🌪️ {twist}" if not twist.startswith("🌪️") else twist
         
     except Exception as e:
         print(f"Mistral API error: {e}")
         # Language-specific fallback on error
         if detected_lang == 'ar':
-            arabic_fallbacks = [
-                "🌪️ وفجأة، ظهر من العدم رجل غامض يحمل مفتاحاً ذهبياً...",
-                "🌪️ وإذا بالأرض تهتز وتنفتح عن كنز مدفون منذ قرون...",
-                "🌪️ وفي تلك اللحظة، سمع صوتاً يناديه من السماء..."
-            ]
-            return random.choice(arabic_fallbacks)
+            return _rng.choice(ARABIC_ERROR_FALLBACK_TWISTS)
+        return _rng.choice(ENGLISH_ERROR_FALLBACK_TWISTS)
+
+async def stream_ai_twist(story_content: str) -> AsyncIterator[str]:
+    """Yield an AI twist in pieces as it is generated, falling back like generate_ai_twist"""
+    detected_lang = detect_language(story_content)
+    
+    if not GROQ_CLIENT:
+        if detected_lang == 'ar':
+            yield _rng.choice(ARABIC_FALLBACK_TWISTS)
         else:
-            english_fallbacks = [
-                "🌪️ Suddenly, a mysterious figure emerged from the shadows...",
-                "🌪️ At that moment, the ground began to shake and revealed a hidden secret...",
-                "🌪️ Just then, a voice called out from somewhere unexpected..."
-            ]
-            return random.choice(english_fallbacks)
+            yield _rng.choice(ENGLISH_FALLBACK_TWISTS)
+        return
+    
+    # Hold back the opening characters until we know whether to prefix the emoji
+    head = ""
+    emitted = False
+    try:
+        async for delta in groq_completion_stream(_twist_prompt(story_content, detected_lang), max_tokens=150, temperature=0.8):
+            if emitted:
+                yield delta
+                continue
+            head = (head + delta).lstrip()
+            if len(head) >= len("🌪️"):
+                yield head if head.startswith("🌪️") else f"🌪️ {head}"
+                emitted = True
+        if not emitted:
+            yield head if head.startswith("🌪️") else f"🌪️ {head}"
+    except Exception as e:
+        print(f"Mistral API error: {e}")
+        # Only fall back if nothing has reached the client yet; a partial
+        # twist is reported to the caller rather than passed off as complete
+        if emitted:
+            raise
+        if detected_lang == 'ar':
+            yield _rng.choice(ARABIC_ERROR_FALLBACK_TWISTS)
+        else:
+            yield _rng.choice(ENGLISH_ERROR_FALLBACK_TWISTS)
 
 @app.post("/api/v1/stories/twist")
 async def add_twist(
@@ -607,55 +904,156 @@ async def add_twist(
         raise HTTPException(status_code=400, detail="Story is not active")
     
     # Generate AI twist
-    story_content = "\n".join([turn.content for turn in story.turns])
+    story_content = "\n".join(turn.content for turn in story.turns)
     twist_content = await generate_ai_twist(story_content)
     
+    # Claim the next turn number and bump the counters in SQL, since other
+    # turns may have landed while the twist was being generated
+    result = await db.execute(
+        update(Story)
+        .where(Story.id == story.id)
+        .values(
+            current_turn=Story.current_turn + 1,
+            total_turns=Story.total_turns + 1,
+            twist_count=Story.twist_count + 1,
+            turns_since_last_twist=0
+        )
+        .returning(Story.current_turn)
+    )
+    new_turn_number = result.scalar_one()
+    
     # Create twist turn
-    new_turn_number = story.current_turn + 1
     turn = Turn(
         id=uuid.uuid4(),
         story_id=story.id,
         author_name=f"{nickname} (Twist)",
         content=twist_content,
         is_twist=True,
-        turn_number=new_turn_number,
-        created_at=datetime.utcnow()
+        turn_number=new_turn_number
     )
     db.add(turn)
     
-    # Update story current turn
-    story.current_turn = new_turn_number
-    
     await db.commit()
+    await publish_team_event(story.team_id, 'turn_added', story_id=story.id, turn_number=new_turn_number)
     
     return {"message": "Twist added successfully", "turn_number": new_turn_number}
 
+@app.post("/api/v1/stories/twist/stream")
+async def stream_twist(
+    request: TwistRequest,
+    db: AsyncSession = Depends(get_db),
+    headers: dict = Depends(get_event_headers)
+):
+    """Add a twist to the story, streaming it as Server-Sent Events.
+    
+    Sends `data: {"delta": ...}` frames while the twist is generated, then an
+    `event: done` frame carrying the saved turn once it is committed, or an
+    `event: error` frame (and nothing saved) if generation fails mid-stream.
+    """
+    nickname = headers["nickname"]
+    
+    # Find story
+    try:
+        story_uuid = uuid.UUID(request.story_id)
+    except ValueError:
+        print(f"❌ Invalid story ID format: {request.story_id}")
+        raise HTTPException(status_code=400, detail=f"Invalid story ID format: {request.story_id}")
+    
+    result = await db.execute(
+        select(Story, story_elapsed_seconds())
+        .options(selectinload(Story.turns))
+        .where(Story.id == story_uuid)
+    )
+    row = result.first()
+    
+    if not row:
+        raise HTTPException(status_code=404, detail="Story not found")
+    story, elapsed_seconds = row
+    
+    # Check if session time has expired
+    if elapsed_seconds >= SESSION_DURATION_SECONDS:
+        await complete_expired_story(db, story.id)
+        raise HTTPException(status_code=400, detail="Session has ended")
+    
+    if story.status != StoryStatus.ACTIVE:
+        raise HTTPException(status_code=400, detail="Story is not active")
+    
+    story_id, team_id = story.id, story.team_id
+    story_content = "\n".join(turn.content for turn in story.turns)
+    
+    # Release the connection while the twist is being generated
+    await db.close()
+    
+    async def event_stream():
+        parts = []
+        try:
+            async for delta in stream_ai_twist(story_content):
+                parts.append(delta)
+                yield b"data: " + orjson.dumps({"delta": delta}) + b"\n\n"
+        except Exception:
+            # A truncated twist is not saved as a turn
+            yield b"event: error\ndata: " + orjson.dumps({"detail": "Twist generation failed"}) + b"\n\n"
+            return
+        twist_content = "".join(parts).strip()
+        
+        # Claim the next turn number in the UPDATE itself, since other turns
+        # may have landed while the twist was streaming
+        async with async_session() as write_db:
+            result = await write_db.execute(
+                update(Story)
+                .where(Story.id == story_id)
+                .values(
+                    current_turn=Story.current_turn + 1,
+                    total_turns=Story.total_turns + 1,
+                    twist_count=Story.twist_count + 1,
+                    turns_since_last_twist=0
+                )
+                .returning(Story.current_turn)
+            )
+            turn_number = result.scalar_one()
+            write_db.add(Turn(
+                id=uuid.uuid4(),
+                story_id=story_id,
+                author_name=f"{nickname} (Twist)",
+                content=twist_content,
+                is_twist=True,
+                turn_number=turn_number
+            ))
+            await write_db.commit()
+        await publish_team_event(team_id, 'turn_added', story_id=story_id, turn_number=turn_number)
+        
+        yield b"event: done\ndata: " + orjson.dumps({"turn_number": turn_number, "content": twist_content}) + b"\n\n"
+    
+    response = StreamingResponse(event_stream(), media_type="text/event-stream")
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
 @app.get("/api/v1/stories/{story_id}/status", response_model=StoryStatusResponse)
 async def get_story_status(
-    story_id: str,
+    story_id: uuid.UUID,
     db: AsyncSession = Depends(get_db),
     headers: dict = Depends(get_event_headers)
 ):
     result = await db.execute(
-        select(Story).options(selectinload(Story.turns)).where(Story.id == uuid.UUID(story_id))
+        select(Story, story_elapsed_seconds()).where(Story.id == story_id)
     )
-    story = result.scalar_one_or_none()
-    if not story:
+    row = result.first()
+    if not row:
         raise HTTPException(status_code=404, detail="Story not found")
+    story, elapsed_seconds = row
     
     # Calculate time remaining and check if session is completed
-    now = datetime.utcnow()
-    elapsed_seconds = (now - story.started_at).total_seconds()
-    time_remaining_seconds = max(0, SESSION_DURATION_SECONDS - elapsed_seconds)
+    time_remaining_seconds = max(0, SESSION_DURATION_SECONDS - float(elapsed_seconds))
     
-    # Auto-complete story if time is up
+    # Auto-complete story if time is up, reporting the status just written
     is_completed = time_remaining_seconds <= 0
-    if is_completed and story.status == StoryStatus.ACTIVE:
-        story.status = StoryStatus.COMPLETED
-        await db.commit()
+    status = story.status
+    if is_completed and status == StoryStatus.ACTIVE:
+        await complete_expired_story(db, story.id)
+        status = StoryStatus.COMPLETED
     
-    status_value = story.status.value if hasattr(story.status, "value") else str(story.status)
-    total_turns = len(story.turns) if hasattr(story, "turns") and story.turns is not None else story.current_turn
+    status_value = status.value if hasattr(status, "value") else str(status)
+    total_turns = story.total_turns
     
     return StoryStatusResponse(
         id=str(story.id),
@@ -683,15 +1081,43 @@ async def debug_test():
     """Simple test endpoint to verify API routes work"""
     return {"message": "API routes are working", "timestamp": datetime.utcnow()}
 
+# Fallback session feedback by language, filled in with str.format_map
+_FEEDBACK_TEMPLATES = {
+    'ar': {
+        'creativity': "مفردات إبداعية رائعة مع {unique_words} كلمة فريدة! تُظهر القصة خيالاً إبداعياً مميزاً.",
+        'engagement': "مشاركة قوية بمعدل {avg_turns:.1f} دور لكل شخص!",
+        'collaboration': "عمل جماعي ممتاز مع {transitions} انتقال سلس بين {participants} مشارك!"
+    },
+    'en': {
+        'creativity': "Great creative vocabulary with {unique_words} unique words! The story shows imaginative storytelling.",
+        'engagement': "Strong participation with {avg_turns:.1f} turns per person on average!",
+        'collaboration': "Excellent teamwork with {transitions} smooth transitions between {participants} participants!"
+    }
+}
+
 async def generate_session_analysis(story_content: str, turns: list, session_duration_minutes: int) -> dict:
     """Generate AI-powered session analysis with creativity, engagement, and collaboration scores"""
     
     # Detect the primary language of the story content
     detected_lang = detect_language(story_content)
     
-    # Calculate basic metrics
-    total_turns = len([t for t in turns if not t.is_twist])
-    unique_participants = len(set([t.author_name for t in turns if not t.is_twist and t.author_name != "StoryBot"]))
+    # Calculate basic metrics in a single pass: per-author counts of non-twist
+    # turns, twists, and handoffs between consecutive (non-StoryBot) authors
+    author_turn_counts = Counter()
+    twist_turns = 0
+    turn_transitions = 0
+    prev_author = None
+    for turn in turns:
+        if turn.is_twist:
+            twist_turns += 1
+            continue
+        author_turn_counts[turn.author_name] += 1
+        if turn.author_name != "StoryBot":
+            if prev_author and prev_author != turn.author_name:
+                turn_transitions += 1
+            prev_author = turn.author_name
+    total_turns = sum(author_turn_counts.values())
+    unique_participants = len(author_turn_counts) - ("StoryBot" in author_turn_counts)
     
     # If no user contributions, return zero scores
     if total_turns == 0 or unique_participants == 0:
@@ -707,10 +1133,15 @@ async def generate_session_analysis(story_content: str, turns: list, session_dur
             "session_duration_minutes": session_duration_minutes
         }
     
+    # Tokenize the story once for the vocabulary and length metrics below
+    words = story_content.split()
+    word_count = len(words)
+    unique_word_count = len(set(words))
+    
     # Creativity Analysis
     creativity_score = min(100, max(20, 
-        len(set(story_content.split())) * 2 +  # Unique vocabulary
-        len([t for t in turns if t.is_twist]) * 15 +  # Twist integration
+        unique_word_count * 2 +  # Unique vocabulary
+        twist_turns * 15 +  # Twist integration
         min(30, len(turns) * 3)  # Story length bonus
     ))
     
@@ -723,21 +1154,14 @@ async def generate_session_analysis(story_content: str, turns: list, session_dur
     ))
     
     # Collaboration Analysis
-    turn_transitions = 0
-    prev_author = None
-    for turn in turns:
-        if not turn.is_twist and turn.author_name != "StoryBot":
-            if prev_author and prev_author != turn.author_name:
-                turn_transitions += 1
-            prev_author = turn.author_name
-    
     collaboration_score = min(100, max(10,
         turn_transitions * 15 +  # Smooth handoffs
         (unique_participants - 1) * 20 +  # Team diversity
-        min(30, len(story_content.split()) // 10)  # Story coherence
+        min(30, word_count // 10)  # Story coherence
     ))
     
     # Generate AI feedback if Groq is available
+    feedback_by_category = {}
     if GROQ_CLIENT:
         try:
             # Create language-specific analysis prompt
@@ -756,6 +1180,7 @@ async def generate_session_analysis(story_content: str, turns: list, session_dur
                 3. التعاون (النتيجة: {collaboration_score}/100)
                 
                 اجعل التعليقات إيجابية وبناءة باللغة العربية.
+                أجب بكائن JSON فقط بالشكل: {{"creativity": "...", "engagement": "...", "collaboration": "..."}}
                 """
             else:
                 analysis_prompt = f"""
@@ -772,46 +1197,28 @@ async def generate_session_analysis(story_content: str, turns: list, session_dur
                 3. Collaboration (score: {collaboration_score}/100)
                 
                 Keep feedback positive and constructive in English.
+                Respond only with a JSON object: {{"creativity": "...", "engagement": "...", "collaboration": "..."}}
                 """
             
-            completion = GROQ_CLIENT.chat.completions.create(
-                model="mistral-saba-24b",
-                messages=[{"role": "user", "content": analysis_prompt}],
-                max_tokens=400,
-                temperature=0.7
-            )
-            
-            ai_feedback = completion.choices[0].message.content.strip()
-            feedback_lines = ai_feedback.split('\n')
-            
-            creativity_feedback = next((line for line in feedback_lines if 'creativity' in line.lower()), 
-                                     f"Great creative vocabulary with {len(set(story_content.split()))} unique words! The story shows imaginative storytelling.")
-            engagement_feedback = next((line for line in feedback_lines if 'engagement' in line.lower()), 
-                                     f"Strong participation with {avg_turns_per_participant:.1f} turns per person on average!")
-            collaboration_feedback = next((line for line in feedback_lines if 'collaboration' in line.lower()), 
-                                        f"Excellent teamwork with {turn_transitions} smooth transitions between {unique_participants} participants!")
-            
+            ai_feedback = await groq_completion(analysis_prompt, max_tokens=250, temperature=0.7, json_mode=True)
+            feedback_by_category = orjson.loads(ai_feedback)
+            if not isinstance(feedback_by_category, dict):
+                raise ValueError("AI feedback is not a JSON object")
         except Exception as e:
+            feedback_by_category = {}
             print(f"AI feedback generation failed: {e}")
-            # Language-specific fallback template feedback
-            if detected_lang == 'ar':
-                creativity_feedback = f"مفردات إبداعية رائعة مع {len(set(story_content.split()))} كلمة فريدة! تُظهر القصة خيالاً إبداعياً مميزاً."
-                engagement_feedback = f"مشاركة قوية بمعدل {avg_turns_per_participant:.1f} دور لكل شخص!"
-                collaboration_feedback = f"عمل جماعي ممتاز مع {turn_transitions} انتقال سلس بين {unique_participants} مشارك!"
-            else:
-                creativity_feedback = f"Great creative vocabulary with {len(set(story_content.split()))} unique words! The story shows imaginative storytelling."
-                engagement_feedback = f"Strong participation with {avg_turns_per_participant:.1f} turns per person on average!"
-                collaboration_feedback = f"Excellent teamwork with {turn_transitions} smooth transitions between {unique_participants} participants!"
-    else:
-        # Language-specific fallback feedback when no AI available
-        if detected_lang == 'ar':
-            creativity_feedback = f"مفردات إبداعية رائعة مع {len(set(story_content.split()))} كلمة فريدة! تُظهر القصة خيالاً إبداعياً مميزاً."
-            engagement_feedback = f"مشاركة قوية بمعدل {avg_turns_per_participant:.1f} دور لكل شخص!"
-            collaboration_feedback = f"عمل جماعي ممتاز مع {turn_transitions} انتقال سلس بين {unique_participants} مشارك!"
-        else:
-            creativity_feedback = f"Great creative vocabulary with {len(set(story_content.split()))} unique words! The story shows imaginative storytelling."
-            engagement_feedback = f"Strong participation with {avg_turns_per_participant:.1f} turns per person on average!"
-            collaboration_feedback = f"Excellent teamwork with {turn_transitions} smooth transitions between {unique_participants} participants!"
+    
+    # Language-specific template feedback for any category the AI didn't cover
+    templates = _FEEDBACK_TEMPLATES[detected_lang]
+    template_values = {
+        'unique_words': unique_word_count,
+        'avg_turns': avg_turns_per_participant,
+        'transitions': turn_transitions,
+        'participants': unique_participants
+    }
+    creativity_feedback = feedback_by_category.get('creativity') or templates['creativity'].format_map(template_values)
+    engagement_feedback = feedback_by_category.get('engagement') or templates['engagement'].format_map(template_values)
+    collaboration_feedback = feedback_by_category.get('collaboration') or templates['collaboration'].format_map(template_values)
     
     return {
         "creativity_score": creativity_score,
@@ -827,29 +1234,31 @@ async def generate_session_analysis(story_content: str, turns: list, session_dur
 
 @app.get("/api/v1/stories/{story_id}/analysis", response_model=SessionAnalysisResponse)
 async def get_session_analysis(
-    story_id: str,
+    story_id: uuid.UUID,
     db: AsyncSession = Depends(get_db),
     headers: dict = Depends(get_event_headers)
 ):
     """Get or generate session analysis for a completed story"""
+    # Analyses never change once written, so serve repeat requests from memory
+    # (admin delete_session evicts analyses of deleted stories)
+    cached = analysis_cache.get(story_id)
+    if cached is not None:
+        return cached
     
-    # Get story with turns
+    # Fetch the story and any existing analysis in one round trip
     result = await db.execute(
-        select(Story).options(selectinload(Story.turns)).where(Story.id == uuid.UUID(story_id))
+        select(Story, SessionAnalysis)
+        .outerjoin(SessionAnalysis, SessionAnalysis.story_id == Story.id)
+        .where(Story.id == story_id)
     )
-    story = result.scalar_one_or_none()
-    if not story:
+    row = result.first()
+    if not row:
         raise HTTPException(status_code=404, detail="Story not found")
-    
-    # Check if analysis already exists
-    existing_analysis = await db.execute(
-        select(SessionAnalysis).where(SessionAnalysis.story_id == uuid.UUID(story_id))
-    )
-    analysis = existing_analysis.scalar_one_or_none()
+    story, analysis = row
     
     if analysis:
         # Return existing analysis
-        return SessionAnalysisResponse(
+        response = SessionAnalysisResponse(
             creativity_score=analysis.creativity_score,
             engagement_score=analysis.engagement_score,
             collaboration_score=analysis.collaboration_score,
@@ -860,12 +1269,22 @@ async def get_session_analysis(
             unique_participants=analysis.unique_participants,
             session_duration_minutes=analysis.session_duration_minutes
         )
+        analysis_cache[story_id] = response
+        return response
+    
+    # Only a fresh analysis needs the story's turns, and only these columns of them
+    turns_result = await db.execute(
+        select(Turn.content, Turn.author_name, Turn.is_twist)
+        .where(Turn.story_id == story.id)
+        .order_by(Turn.turn_number)
+    )
+    turns = turns_result.all()
     
     # Generate new analysis
-    story_content = story.initial_prompt + " " + " ".join([turn.content for turn in story.turns])
+    story_content = " ".join(chain((story.initial_prompt,), (turn.content for turn in turns)))
     session_duration = int((datetime.utcnow() - story.started_at).total_seconds() / 60)
     
-    analysis_data = await generate_session_analysis(story_content, story.turns, session_duration)
+    analysis_data = await generate_session_analysis(story_content, turns, session_duration)
     
     # Save analysis to database
     new_analysis = SessionAnalysis(
@@ -883,9 +1302,12 @@ async def get_session_analysis(
     )
     
     db.add(new_analysis)
+    await add_analysis_to_leaderboard(db, story.team_id, new_analysis)
     await db.commit()
     
-    return SessionAnalysisResponse(**analysis_data)
+    response = SessionAnalysisResponse(**analysis_data)
+    analysis_cache[story_id] = response
+    return response
 
 
 # Leaderboard Models
@@ -908,6 +1330,26 @@ class LeaderboardTeam(BaseModel):
 class LeaderboardResponse(BaseModel):
     teams: List[LeaderboardTeam]
     total_teams: int
+    next_cursor: Optional[str] = None
+
+
+LEADERBOARD_MAX_PAGE_SIZE = 500
+
+# Leaderboard keyset order; team_code breaks ties so every row has a unique position
+LEADERBOARD_ORDER = (TeamLeaderboard.stories_completed, TeamLeaderboard.total_turns, TeamLeaderboard.team_code)
+
+def encode_leaderboard_cursor(team: LeaderboardTeam) -> str:
+    """Opaque cursor pointing just past the given team"""
+    position = [team.stories_completed, team.total_turns, team.team_code]
+    return base64.urlsafe_b64encode(orjson.dumps(position)).decode()
+
+def decode_leaderboard_cursor(cursor: str) -> tuple:
+    """Inverse of encode_leaderboard_cursor; raises 400 on a malformed cursor"""
+    try:
+        stories_completed, total_turns, team_code = orjson.loads(base64.urlsafe_b64decode(cursor))
+        return int(stories_completed), int(total_turns), str(team_code)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid leaderboard cursor")
 
 
 @app.get("/api/v1/leaderboard/teams", response_model=LeaderboardResponse)
@@ -916,118 +1358,69 @@ async def get_leaderboard_teams(
     x_event_mode: str = Header(..., alias="X-Event-Mode"),
     x_nickname: str = Header(..., alias="X-Nickname"), 
     x_team_code: str = Header(..., alias="X-Team-Code"),
-    x_event_session: str = Header(..., alias="X-Event-Session")
+    x_event_session: str = Header(..., alias="X-Event-Session"),
+    limit: Optional[int] = Query(None, ge=1, le=LEADERBOARD_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None
 ):
-    """Get leaderboard of all teams with their stats"""
-    
-    # Get only teams with completed sessions for leaderboard
-    query = select(Team).join(Session).where(
-        Session.status == SessionStatus.COMPLETED
-    ).options(
-        selectinload(Team.sessions),
-        selectinload(Team.stories).selectinload(Story.turns),
-        selectinload(Team.stories).selectinload(Story.analyses)
+    """Get leaderboard of all teams with their stats.
+    
+    Passing limit returns one page in rank order plus next_cursor for the page
+    after it; without limit every team is returned.
+    """
+    # Read the denormalized rows kept current by leaderboard.py; score averages
+    # are divided out of the running totals here
+    query = (
+        select(
+            TeamLeaderboard.team_code, TeamLeaderboard.team_name,
+            TeamLeaderboard.participants, TeamLeaderboard.stories_completed,
+            TeamLeaderboard.total_turns, TeamLeaderboard.twist_count,
+            TeamLeaderboard.user_turns,
+            average_score(TeamLeaderboard.creativity_sum).label('avg_creativity_score'),
+            average_score(TeamLeaderboard.engagement_sum).label('avg_engagement_score'),
+            average_score(TeamLeaderboard.collaboration_sum).label('avg_collaboration_score'),
+            TeamLeaderboard.last_active, TeamLeaderboard.session_status,
+            TeamLeaderboard.session_ended_at
+        )
+        # Sort by stories completed (descending), then by total turns (descending)
+        .order_by(*(column.desc() for column in LEADERBOARD_ORDER))
     )
+    if cursor:
+        query = query.where(tuple_(*LEADERBOARD_ORDER) < tuple_(*decode_leaderboard_cursor(cursor)))
+    if limit:
+        # One extra row tells us whether another page follows
+        query = query.limit(limit + 1)
     
     result = await db.execute(query)
-    teams = result.scalars().all()
+    leaderboard_teams = [LeaderboardTeam(**row) for row in result.mappings()]
     
-    leaderboard_teams = []
+    if not limit:
+        return LeaderboardResponse(
+            teams=leaderboard_teams,
+            total_teams=len(leaderboard_teams)
+        )
     
-    for team in teams:
-        # Only process teams with completed sessions
-        completed_sessions = [s for s in team.sessions if s.status == SessionStatus.COMPLETED]
-        if not completed_sessions:
-            continue
-            
-        # Calculate team stats
-        total_stories = 0
-        total_turns = 0
-        total_twist_turns = 0
-        total_user_turns = 0
-        creativity_scores = []
-        engagement_scores = []
-        collaboration_scores = []
-        participants = set()
-        last_active = None
-        
-        # Track session status - get the most recent completed session
-        session_status = "completed"
-        session_ended_at = None
-        if completed_sessions:
-            latest_session = max(completed_sessions, key=lambda s: s.started_at)
-            session_status = latest_session.status
-            session_ended_at = latest_session.ended_at
-        
-        # Process team's stories directly (not through sessions)
-        for story in team.stories:
-            if story.status == StoryStatus.COMPLETED:
-                total_stories += 1
-            
-            # Count turns and participants
-            for turn in story.turns:
-                total_turns += 1  # Count all turns
-                if turn.is_twist or turn.author_name == "StoryTwister":
-                    total_twist_turns += 1
-                elif turn.author_name != "StoryBot":
-                    total_user_turns += 1
-                    participants.add(turn.author_name)
-            
-            # Get analysis scores
-            for analysis in story.analyses:
-                creativity_scores.append(analysis.creativity_score)
-                engagement_scores.append(analysis.engagement_score)
-                collaboration_scores.append(analysis.collaboration_score)
-            
-            # Track last activity (use created_at since updated_at doesn't exist)
-            if story.created_at:
-                if not last_active or story.created_at > last_active:
-                    last_active = story.created_at
-        
-        # Calculate averages
-        avg_creativity = sum(creativity_scores) / len(creativity_scores) if creativity_scores else None
-        avg_engagement = sum(engagement_scores) / len(engagement_scores) if engagement_scores else None
-        avg_collaboration = sum(collaboration_scores) / len(collaboration_scores) if collaboration_scores else None
-        
-        leaderboard_teams.append(LeaderboardTeam(
-            team_code=team.code,
-            team_name=team.name,
-            participants=len(participants),
-            stories_completed=total_stories,
-            total_turns=total_turns,
-            twist_count=total_twist_turns,
-            user_turns=total_user_turns,
-            avg_creativity_score=avg_creativity,
-            avg_engagement_score=avg_engagement,
-            avg_collaboration_score=avg_collaboration,
-            last_active=last_active,
-            session_status=session_status,
-            session_ended_at=session_ended_at
-        ))
-    
-    # Sort by stories completed (descending), then by total turns (descending)
-    leaderboard_teams.sort(key=lambda x: (x.stories_completed, x.total_turns), reverse=True)
+    next_cursor = None
+    if len(leaderboard_teams) > limit:
+        leaderboard_teams = leaderboard_teams[:limit]
+        next_cursor = encode_leaderboard_cursor(leaderboard_teams[-1])
+    total_teams = await db.scalar(select(func.count()).select_from(TeamLeaderboard))
     
     return LeaderboardResponse(
         teams=leaderboard_teams,
-        total_teams=len(leaderboard_teams)
+        total_teams=total_teams,
+        next_cursor=next_cursor
     )
 
 
 @app.post("/api/v1/sessions/{session_id}/complete")
 async def complete_session(
-    session_id: str,
+    session_id: uuid.UUID,
     db: AsyncSession = Depends(get_db),
     headers: dict = Depends(get_event_headers)
 ):
     """Mark a session as completed when all team members exit"""
-    try:
-        session_uuid = UUID(session_id)
-    except ValueError:
-        raise HTTPException(status_code=400, detail="Invalid session ID format")
-    
     # Get the session
-    query = select(Session).where(Session.id == session_uuid)
+    query = select(Session).where(Session.id == session_id)
     result = await db.execute(query)
     session = result.scalar_one_or_none()
     
@@ -1037,6 +1430,8 @@ async def complete_session(
     # Mark session as completed
     session.status = SessionStatus.COMPLETED
     session.ended_at = datetime.utcnow()
+    await db.flush()
+    await refresh_team_leaderboard(db, session.team_id)
     
     await db.commit()
     
@@ -1,11 +1,15 @@
 import uuid
-from datetime import datetime
 from enum import Enum
-from sqlalchemy import Column, String, DateTime, Integer, Text, Boolean, ForeignKey, Index
+from sqlalchemy import text, Column, String, DateTime, Integer, Text, Boolean, ForeignKey, Index, LargeBinary
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from database import Base
 
+# Naive UTC timestamp taken from the database clock, matching datetime.utcnow().
+# statement_timestamp() rather than now(), which is frozen at transaction start
+# and would backdate rows written after a slow call inside the transaction
+SQL_UTCNOW = text("timezone('utc', statement_timestamp())")
+
 class SessionStatus(str, Enum):
     WAITING = "waiting"
     ACTIVE = "active"
@@ -21,23 +25,34 @@ class Team(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     code = Column(String(50), unique=True, nullable=False, index=True)
     name = Column(String(255), nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, server_default=SQL_UTCNOW)
     
     # Relationships
-    sessions = relationship("Session", back_populates="team")
-    stories = relationship("Story", back_populates="team")
+    sessions = relationship("Session", back_populates="team", lazy="raise")
+    stories = relationship("Story", back_populates="team", lazy="raise")
+    
+    # Fetch the server-generated created_at with RETURNING on insert
+    __mapper_args__ = {'eager_defaults': True}
 
 class Session(Base):
     __tablename__ = "sessions"
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     team_id = Column(UUID(as_uuid=True), ForeignKey("teams.id"), nullable=False)
-    started_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, server_default=SQL_UTCNOW)
     ended_at = Column(DateTime, nullable=True)  # Track when session ended
     status = Column(String(20), default=SessionStatus.ACTIVE)
     
     # Relationships
-    team = relationship("Team", back_populates="sessions")
+    team = relationship("Team", back_populates="sessions", lazy="raise")
+    
+    # Index for performance
+    __table_args__ = (
+        # Also serves the leaderboard's latest-completed-session lookup
+        Index('idx_sessions_team_status_started', 'team_id', 'status', started_at.desc()),
+    )
+    # Fetch the server-generated started_at with RETURNING on insert
+    __mapper_args__ = {'eager_defaults': True}
 
 class Story(Base):
     __tablename__ = "stories"
@@ -47,14 +62,27 @@ class Story(Base):
     title = Column(String(255), nullable=False)
     initial_prompt = Column(Text, nullable=False)
     current_turn = Column(Integer, default=0)
+    # Denormalized counters kept in step with current_turn so the auto-twist
+    # check and the leaderboard never have to scan the story's turns
+    turns_since_last_twist = Column(Integer, nullable=False, default=0, server_default='0')
+    total_user_turns = Column(Integer, nullable=False, default=0, server_default='0')
+    total_turns = Column(Integer, nullable=False, default=0, server_default='0')
+    twist_count = Column(Integer, nullable=False, default=0, server_default='0')
     status = Column(String(20), default=StoryStatus.ACTIVE)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    started_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, server_default=SQL_UTCNOW)
+    started_at = Column(DateTime, server_default=SQL_UTCNOW)
     
     # Relationships
-    team = relationship("Team", back_populates="stories")
-    turns = relationship("Turn", back_populates="story", order_by="Turn.turn_number")
-    analyses = relationship("SessionAnalysis", back_populates="story")
+    team = relationship("Team", back_populates="stories", lazy="raise")
+    turns = relationship("Turn", back_populates="story", order_by="Turn.turn_number", lazy="raise")
+    analyses = relationship("SessionAnalysis", back_populates="story", lazy="raise")
+    
+    # Index for performance
+    __table_args__ = (
+        Index('idx_stories_team_status', 'team_id', 'status'),
+    )
+    # Fetch server-generated timestamps with RETURNING on insert
+    __mapper_args__ = {'eager_defaults': True}
 
 class Turn(Base):
     __tablename__ = "turns"
@@ -65,10 +93,21 @@ class Turn(Base):
     content = Column(Text, nullable=False)
     is_twist = Column(Boolean, default=False)
     turn_number = Column(Integer, nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, server_default=SQL_UTCNOW)
     
     # Relationships
-    story = relationship("Story", back_populates="turns")
+    story = relationship("Story", back_populates="turns", lazy="raise")
+    
+    # Index for performance
+    __table_args__ = (
+        Index('idx_turns_story_turn_number', 'story_id', 'turn_number'),
+        # Covers per-story author/twist aggregation without heap fetches
+        Index(
+            'idx_turns_story_author_twist', 'story_id', 'author_name', 'is_twist',
+            postgresql_include=['turn_number']
+        ),
+    )
+    __mapper_args__ = {'eager_defaults': True}
 
 class SessionAnalysis(Base):
     __tablename__ = "session_analyses"
@@ -91,10 +130,10 @@ class SessionAnalysis(Base):
     unique_participants = Column(Integer, nullable=False)
     session_duration_minutes = Column(Integer, nullable=False)
     
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, server_default=SQL_UTCNOW)
     
     # Relationships
-    story = relationship("Story", back_populates="analyses")
+    story = relationship("Story", back_populates="analyses", lazy="raise")
 
 
 class User(Base):
@@ -108,12 +147,12 @@ class User(Base):
     role = Column(String(20), default="user")  # 'admin' or 'user'
     is_active = Column(Boolean, default=True)
     is_system_user = Column(Boolean, default=False)  # For seeded admin
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, server_default=SQL_UTCNOW)
     last_login = Column(DateTime, nullable=True)
     
     # Relationships
-    api_tokens = relationship("ApiToken", back_populates="user")
-    admin_actions = relationship("AdminAction", back_populates="user")
+    api_tokens = relationship("ApiToken", back_populates="user", lazy="raise")
+    admin_actions = relationship("AdminAction", back_populates="user", lazy="raise")
 
 
 class ApiToken(Base):
@@ -122,15 +161,15 @@ class ApiToken(Base):
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=True)  # Nullable for system tokens
-    token_hash = Column(String(255), unique=True, nullable=False, index=True)
+    token_hash = Column(LargeBinary(32), unique=True, nullable=False, index=True)  # Raw SHA-256 digest
     name = Column(String(100), nullable=False)  # Human-readable token name
     is_active = Column(Boolean, default=True)
     expires_at = Column(DateTime, nullable=True)  # Nullable for non-expiring tokens
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, server_default=SQL_UTCNOW)
     last_used = Column(DateTime, nullable=True)
     
     # Relationships
-    user = relationship("User", back_populates="api_tokens")
+    user = relationship("User", back_populates="api_tokens", lazy="raise")
 
 
 class AdminAction(Base):
@@ -145,10 +184,10 @@ class AdminAction(Base):
     payload_json = Column(Text, nullable=True)  # JSON payload of the action
     ip_address = Column(String(45), nullable=True)  # Support IPv6
     user_agent = Column(String(500), nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, server_default=SQL_UTCNOW)
     
     # Relationships
-    user = relationship("User", back_populates="admin_actions")
+    user = relationship("User", back_populates="admin_actions", lazy="raise")
     
     # Index for performance
     __table_args__ = (
@@ -156,3 +195,32 @@ class AdminAction(Base):
         Index('idx_admin_actions_team_code', 'team_code'),
         Index('idx_admin_actions_action', 'action'),
     )
+
+
+class TeamLeaderboard(Base):
+    """Denormalized per-team leaderboard stats, refreshed when sessions complete
+    or analyses are added (see leaderboard.refresh_team_leaderboard)"""
+    __tablename__ = "team_leaderboard"
+    
+    team_id = Column(UUID(as_uuid=True), ForeignKey("teams.id"), primary_key=True)
+    team_code = Column(String(50), nullable=False)
+    team_name = Column(String(255), nullable=False)
+    participants = Column(Integer, nullable=False, default=0)
+    stories_completed = Column(Integer, nullable=False, default=0)
+    total_turns = Column(Integer, nullable=False, default=0)
+    twist_count = Column(Integer, nullable=False, default=0)
+    user_turns = Column(Integer, nullable=False, default=0)
+    # Running score totals; averages are sum / analysis_count at read time
+    creativity_sum = Column(Integer, nullable=False, default=0, server_default='0')
+    engagement_sum = Column(Integer, nullable=False, default=0, server_default='0')
+    collaboration_sum = Column(Integer, nullable=False, default=0, server_default='0')
+    analysis_count = Column(Integer, nullable=False, default=0, server_default='0')
+    last_active = Column(DateTime, nullable=True)
+    session_status = Column(String(20), nullable=False)
+    session_ended_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, server_default=SQL_UTCNOW)
+    
+    # Leaderboard ordering, including the keyset pagination tiebreaker
+    __table_args__ = (
+        Index('idx_team_leaderboard_rank', stories_completed.desc(), total_turns.desc(), team_code.desc()),
+    )
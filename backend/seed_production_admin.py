@@ -10,6 +10,16 @@ import string
 import hashlib
 from pathlib import Path
 
+# Variables update_env_file() replaces in an existing .env
+ENV_OVERRIDE_PREFIXES = (
+    'ADMIN_SEED_USERNAME=',
+    'ADMIN_SEED_EMAIL=',
+    'ADMIN_SEED_PASSWORD=',
+    'ADMIN_SEED_API_TOKEN=',
+    'NODE_ENV=',
+    'VITE_NODE_ENV='
+)
+
 def generate_strong_password(length=24):
     """Generate a strong password with mixed characters"""
     alphabet = string.ascii_letters + string.digits + "!@#$%^&*"
@@ -24,23 +34,11 @@ def update_env_file(admin_password, admin_token):
     """Update .env file with production admin credentials"""
     env_path = Path(__file__).parent.parent / '.env'
     
-    # Read existing .env content
+    # Read existing .env content, dropping the variables rewritten below
     env_content = []
     if env_path.exists():
-        with open(env_path, 'r') as f:
-            env_content = f.readlines()
-    
-    # Remove existing admin credentials
-    env_content = [line for line in env_content if not any(
-        line.startswith(prefix) for prefix in [
-            'ADMIN_SEED_USERNAME=',
-            'ADMIN_SEED_EMAIL=',
-            'ADMIN_SEED_PASSWORD=',
-            'ADMIN_SEED_API_TOKEN=',
-            'NODE_ENV=',
-            'VITE_NODE_ENV='
-        ]
-    )]
+        with open(env_path, 'r', newline='') as f:
+            env_content = [line for line in f if not line.startswith(ENV_OVERRIDE_PREFIXES)]
     
     # Add production admin credentials
     production_vars = [
@@ -57,7 +55,7 @@ def update_env_file(admin_password, admin_token):
     env_content.extend(production_vars)
     
     # Write updated .env file
-    with open(env_path, 'w') as f:
+    with open(env_path, 'w', newline='') as f:
         f.writelines(env_content)
     
     print(f"✅ Updated {env_path} with production credentials")
@@ -0,0 +1,39 @@
+"""
+Team Lookups for Story-Twister
+Process-local cache of team code -> team, shared by the player and admin APIs
+so both resolve a code to the same team
+"""
+
+from collections import namedtuple
+from typing import Optional
+
+from cachetools import TTLCache
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import Team
+
+# Teams are never renamed or deleted, so lookups by code are safe to cache
+CachedTeam = namedtuple('CachedTeam', ['id', 'name', 'created_at'])
+_team_cache: TTLCache = TTLCache(maxsize=1024, ttl=300)
+
+def cached_team(team_code: str) -> Optional[CachedTeam]:
+    """Return the cached team for a code without querying the database"""
+    return _team_cache.get(team_code)
+
+def cache_team(team_code: str, team: CachedTeam):
+    """Remember a team once its row is committed"""
+    _team_cache[team_code] = team
+
+async def get_team_by_code(db: AsyncSession, team_code: str) -> Optional[CachedTeam]:
+    """Return the team for a code, or None if no such team exists"""
+    team = _team_cache.get(team_code)
+    if team is None:
+        result = await db.execute(
+            select(Team.id, Team.name, Team.created_at).where(Team.code == team_code)
+        )
+        row = result.first()
+        if row is None:
+            return None
+        team = _team_cache[team_code] = CachedTeam(*row)
+    return team
@@ -9,23 +9,35 @@ import json
 import os
 import sys
 import time
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Dict, Any
 
 import aiohttp
 import asyncpg
+import orjson
 
 # Configuration
 BASE_URL = "http://localhost:8000"
 ADMIN_TOKEN = os.getenv("ADMIN_SEED_API_TOKEN", "dev-admin-token")
 TEST_TEAM_CODES = ["smoke-team-1", "smoke-team-2", "smoke-team-3"]
 ARTIFACTS_DIR = "/app/test_artifacts"
+# Print each test's details to the console (they are always saved to the artifacts)
+SMOKE_VERBOSE = bool(os.getenv("SMOKE_VERBOSE"))
+EXPORT_CHUNK_SIZE = 64 * 1024
+# Smoke checks never need more of an admin API response than this
+ADMIN_RESPONSE_MAX_BYTES = 1 << 20
 
 class AdminConsoleTestRunner:
     def __init__(self):
         self.session = None
+        self.pg_pool = None
+        self._admin_base = f"{BASE_URL}/api/v1/admin"
+        self._admin_headers = {"X-Admin-Token": ADMIN_TOKEN, "Content-Type": "application/json"}
+        # Wall-clock anchor for _now_iso(); later timestamps are offsets on the monotonic clock
+        self._t0_wall = datetime.utcnow()
+        self._t0_mono = time.monotonic()
         self.results = {
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": self._t0_wall.isoformat(),
             "base_url": BASE_URL,
             "admin_token_used": ADMIN_TOKEN[:8] + "...",
             "tests": [],
@@ -38,19 +50,50 @@ class AdminConsoleTestRunner:
         }
         
     async def __aenter__(self):
-        self.session = aiohttp.ClientSession()
+        # Bounded per-host concurrency for the gathered probes, with cached DNS
+        # and kept-alive connections when pointed at a remote host
+        connector = aiohttp.TCPConnector(
+            limit=16,
+            limit_per_host=16,
+            ttl_dns_cache=300,
+            keepalive_timeout=60,
+            enable_cleanup_closed=True
+        )
+        self.session = aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=30))
+        # Every test that writes artifacts relies on this directory
+        os.makedirs(ARTIFACTS_DIR, exist_ok=True)
+        # Database checks share one small pool for the runner's lifetime; an
+        # unreachable database only fails those checks, not the whole run
+        try:
+            self.pg_pool = await asyncpg.create_pool(
+                host="db",
+                port=5432,
+                user="postgres",
+                password="postgres",
+                database="story_twister",
+                min_size=1,
+                max_size=2
+            )
+        except Exception as e:
+            print(f"⚠️ Database pool unavailable: {e}")
         return self
         
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         if self.session:
             await self.session.close()
+        if self.pg_pool:
+            await self.pg_pool.close()
             
+    def _now_iso(self) -> str:
+        """Current UTC time as ISO 8601, derived from the monotonic clock"""
+        return (self._t0_wall + timedelta(seconds=time.monotonic() - self._t0_mono)).isoformat()
+        
     def log_test(self, test_name: str, success: bool, details: Dict[str, Any] = None):
         """Log test result"""
         test_result = {
             "test_name": test_name,
             "success": success,
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": self._now_iso(),
             "details": details or {}
         }
         
@@ -66,24 +109,29 @@ class AdminConsoleTestRunner:
             self.results["summary"]["errors"].append(f"{test_name}: {error_msg}")
             print(f"❌ {test_name}: {error_msg}")
             
-        if details:
+        if details and SMOKE_VERBOSE:
             print(f"   Details: {json.dumps(details, indent=2)}")
             
     async def admin_request(self, method: str, endpoint: str, **kwargs) -> Dict[str, Any]:
         """Make authenticated admin API request"""
-        headers = kwargs.get("headers", {})
-        headers["X-Admin-Token"] = ADMIN_TOKEN
-        headers["Content-Type"] = "application/json"
-        kwargs["headers"] = headers
+        caller_headers = kwargs.get("headers")
+        kwargs["headers"] = {**self._admin_headers, **caller_headers} if caller_headers else self._admin_headers
         
-        url = f"{BASE_URL}/api/v1/admin{endpoint}"
+        url = self._admin_base + endpoint
         
         async with self.session.request(method, url, **kwargs) as response:
-            response_text = await response.text()
+            # Read at most ADMIN_RESPONSE_MAX_BYTES; a runaway body fails to parse below
+            raw = bytearray()
+            async for chunk in response.content.iter_chunked(EXPORT_CHUNK_SIZE):
+                raw += chunk
+                if len(raw) >= ADMIN_RESPONSE_MAX_BYTES:
+                    del raw[ADMIN_RESPONSE_MAX_BYTES:]
+                    break
+            response_text = raw.decode(response.charset or "utf-8", errors="replace")
             
             try:
-                response_data = await response.json() if response_text else {}
-            except:
+                response_data = orjson.loads(raw) if raw else {}
+            except orjson.JSONDecodeError:
                 response_data = {"raw_response": response_text}
                 
             return {
@@ -125,12 +173,12 @@ class AdminConsoleTestRunner:
         """Test event bootstrap endpoint"""
         try:
             payload = {"team_codes": TEST_TEAM_CODES}
-            result = await self.admin_request("POST", "/event/bootstrap", 
-                                            data=json.dumps(payload))
+            body = orjson.dumps(payload)
+            result = await self.admin_request("POST", "/event/bootstrap", data=body)
             success = result["status"] == 200
             self.log_test("event_bootstrap", success, {
                 "status_code": result["status"],
-                "payload": payload,
+                "payload_bytes": len(body),
                 "response": result["data"]
             })
             return success
@@ -164,12 +212,12 @@ class AdminConsoleTestRunner:
         """Test room creation endpoint"""
         try:
             payload = {"team_code": "test-room-001", "team_name": "Test Room"}
-            result = await self.admin_request("POST", "/rooms", 
-                                            data=json.dumps(payload))
+            body = orjson.dumps(payload)
+            result = await self.admin_request("POST", "/rooms", data=body)
             success = result["status"] == 200
             self.log_test("room_creation", success, {
                 "status_code": result["status"],
-                "payload": payload,
+                "payload_bytes": len(body),
                 "response": result["data"]
             })
             return success
@@ -181,6 +229,8 @@ class AdminConsoleTestRunner:
         """Test session control endpoints"""
         controls = ["start", "twist", "end"]
         
+        # Each control commits before responding, so awaiting the response is
+        # enough to order them; no settling delay is needed
         for control in controls:
             try:
                 result = await self.admin_request("POST", f"/sessions/{team_id}/{control}")
@@ -192,52 +242,47 @@ class AdminConsoleTestRunner:
                     "response": result["data"]
                 })
                 
-                # Small delay between controls
-                await asyncio.sleep(1)
-                
             except Exception as e:
                 self.log_test(f"session_control_{control}", False, {"error": str(e)})
                 
+    async def _fetch_export(self, format_type: str, headers: Dict[str, str]):
+        """Download one export format, save it as an artifact and log the result"""
+        try:
+            url = f"{BASE_URL}/api/v1/admin/export/{format_type}"
+            
+            async with self.session.get(url, headers=headers) as response:
+                # Stream the export sample to disk chunk by chunk
+                export_file = f"{ARTIFACTS_DIR}/admin_export_sample.{format_type}"
+                content_length = 0
+                with open(export_file, 'wb') as f:
+                    async for chunk in response.content.iter_chunked(EXPORT_CHUNK_SIZE):
+                        f.write(chunk)
+                        content_length += len(chunk)
+                success = response.status == 200 and content_length > 0
+                
+                self.log_test(f"export_{format_type}", success, {
+                    "status_code": response.status,
+                    "content_length": content_length,
+                    "content_type": response.headers.get("content-type"),
+                    "export_file": export_file
+                })
+                
+        except Exception as e:
+            self.log_test(f"export_{format_type}", False, {"error": str(e)})
+            
     async def test_exports(self):
         """Test export endpoints"""
         formats = ["csv", "json"]
+        headers = {"X-Admin-Token": ADMIN_TOKEN}
         
-        for format_type in formats:
-            try:
-                url = f"{BASE_URL}/api/v1/admin/export/{format_type}"
-                headers = {"X-Admin-Token": ADMIN_TOKEN}
-                
-                async with self.session.get(url, headers=headers) as response:
-                    content = await response.read()
-                    success = response.status == 200 and len(content) > 0
-                    
-                    # Save export sample
-                    export_file = f"{ARTIFACTS_DIR}/admin_export_sample.{format_type}"
-                    os.makedirs(ARTIFACTS_DIR, exist_ok=True)
-                    with open(export_file, 'wb') as f:
-                        f.write(content)
-                    
-                    self.log_test(f"export_{format_type}", success, {
-                        "status_code": response.status,
-                        "content_length": len(content),
-                        "content_type": response.headers.get("content-type"),
-                        "export_file": export_file
-                    })
-                    
-            except Exception as e:
-                self.log_test(f"export_{format_type}", False, {"error": str(e)})
+        # Exports are independent, so fetch them concurrently over the shared session
+        await asyncio.gather(*(self._fetch_export(format_type, headers) for format_type in formats))
                 
     async def test_admin_actions_logging(self):
         """Test that admin actions are being logged"""
         try:
-            # Connect to database to check admin_actions table
-            conn = await asyncpg.connect(
-                host="db",
-                port=5432,
-                user="postgres",
-                password="postgres",
-                database="story_twister"
-            )
+            if self.pg_pool is None:
+                raise RuntimeError("Database pool unavailable")
             
             # Check if admin_actions table exists and has recent entries
             query = """
@@ -246,8 +291,8 @@ class AdminConsoleTestRunner:
                 WHERE created_at > NOW() - INTERVAL '1 hour'
             """
             
-            result = await conn.fetchrow(query)
-            await conn.close()
+            async with self.pg_pool.acquire() as conn:
+                result = await conn.fetchrow(query)
             
             action_count = result["action_count"]
             success = action_count > 0
@@ -264,19 +309,16 @@ class AdminConsoleTestRunner:
     async def test_rate_limiting(self):
         """Test rate limiting on admin endpoints"""
         try:
-            # Make multiple rapid requests to test rate limiting
-            requests_made = 0
-            rate_limited = False
-            
-            for i in range(15):  # Exceed the 10/min limit
-                result = await self.admin_request("GET", "/snapshot")
-                requests_made += 1
-                
-                if result["status"] == 429:  # Too Many Requests
-                    rate_limited = True
-                    break
-                    
-                await asyncio.sleep(0.1)  # Small delay
+            # Fire a concurrent burst past the 10/min limit
+            results = await asyncio.gather(
+                *(self.admin_request("GET", "/snapshot") for _ in range(15)),
+                return_exceptions=True
+            )
+            requests_made = len(results)
+            rate_limited = any(
+                result["status"] == 429  # Too Many Requests
+                for result in results if isinstance(result, dict)
+            )
                 
             self.log_test("rate_limiting", rate_limited, {
                 "requests_made": requests_made,
@@ -309,22 +351,20 @@ class AdminConsoleTestRunner:
         # Wait a moment for bootstrap to complete
         await asyncio.sleep(2)
         
-        # Test snapshot and get team data
-        snapshot = await self.test_admin_snapshot()
-        
-        # Test room creation
-        await self.test_room_creation()
+        # Snapshot, room creation, exports and the audit log check don't depend
+        # on each other, so run them concurrently. log_test never awaits, so
+        # interleaved results can't corrupt the shared summary.
+        snapshot, _, _, _ = await asyncio.gather(
+            self.test_admin_snapshot(),
+            self.test_room_creation(),
+            self.test_exports(),
+            self.test_admin_actions_logging()
+        )
         
         # Test session controls if we have teams
         if snapshot and snapshot.get("teams"):
             first_team = snapshot["teams"][0]
             await self.test_session_controls(first_team["team_code"])
-            
-        # Test exports
-        await self.test_exports()
-        
-        # Test admin actions logging
-        await self.test_admin_actions_logging()
         
         # Test rate limiting (this might affect other tests, so run last)
         await self.test_rate_limiting()
@@ -338,31 +378,32 @@ class AdminConsoleTestRunner:
     async def save_results(self):
         """Save test results to artifacts"""
         try:
-            os.makedirs(ARTIFACTS_DIR, exist_ok=True)
-            
             # Save detailed results
             results_file = f"{ARTIFACTS_DIR}/admin_console_smoke_test.json"
-            with open(results_file, 'w') as f:
-                json.dump(self.results, f, indent=2, default=str)
+            with open(results_file, 'wb') as f:
+                f.write(orjson.dumps(self.results, option=orjson.OPT_INDENT_2, default=str))
                 
             print(f"📄 Test results saved to: {results_file}")
             
             # Save summary
+            summary = self.results['summary']
+            lines = [
+                "Admin Console Smoke Test Summary",
+                "=" * 40,
+                f"Timestamp: {self.results['timestamp']}",
+                f"Total Tests: {summary['total_tests']}",
+                f"Passed: {summary['passed']}",
+                f"Failed: {summary['failed']}",
+                f"Success Rate: {(summary['passed'] / max(1, summary['total_tests']) * 100):.1f}%"
+            ]
+            if summary['errors']:
+                lines.append("\nErrors:")
+                lines.extend(f"- {error}" for error in summary['errors'])
+            
             summary_file = f"{ARTIFACTS_DIR}/admin_console_summary.txt"
             with open(summary_file, 'w') as f:
-                f.write("Admin Console Smoke Test Summary\n")
-                f.write("=" * 40 + "\n")
-                f.write(f"Timestamp: {self.results['timestamp']}\n")
-                f.write(f"Total Tests: {self.results['summary']['total_tests']}\n")
-                f.write(f"Passed: {self.results['summary']['passed']}\n")
-                f.write(f"Failed: {self.results['summary']['failed']}\n")
-                f.write(f"Success Rate: {(self.results['summary']['passed'] / max(1, self.results['summary']['total_tests']) * 100):.1f}%\n")
-                
-                if self.results['summary']['errors']:
-                    f.write("\nErrors:\n")
-                    for error in self.results['summary']['errors']:
-                        f.write(f"- {error}\n")
-                        
+                f.write("\n".join(lines) + "\n")
+            
             print(f"📋 Test summary saved to: {summary_file}")
             
         except Exception as e:
@@ -370,23 +411,23 @@ class AdminConsoleTestRunner:
             
     def print_summary(self):
         """Print test summary"""
-        print("\n" + "=" * 60)
-        print("📊 ADMIN CONSOLE SMOKE TEST SUMMARY")
-        print("=" * 60)
-        print(f"Total Tests: {self.results['summary']['total_tests']}")
-        print(f"✅ Passed: {self.results['summary']['passed']}")
-        print(f"❌ Failed: {self.results['summary']['failed']}")
-        
-        success_rate = (self.results['summary']['passed'] / max(1, self.results['summary']['total_tests'])) * 100
-        print(f"📈 Success Rate: {success_rate:.1f}%")
-        
-        if self.results['summary']['errors']:
-            print(f"\n🚨 Errors ({len(self.results['summary']['errors'])}):")
-            for error in self.results['summary']['errors']:
-                print(f"   • {error}")
-                
-        print(f"\n📁 Artifacts saved to: {ARTIFACTS_DIR}")
-        print("=" * 60)
+        summary = self.results['summary']
+        success_rate = (summary['passed'] / max(1, summary['total_tests'])) * 100
+        lines = [
+            "\n" + "=" * 60,
+            "📊 ADMIN CONSOLE SMOKE TEST SUMMARY",
+            "=" * 60,
+            f"Total Tests: {summary['total_tests']}",
+            f"✅ Passed: {summary['passed']}",
+            f"❌ Failed: {summary['failed']}",
+            f"📈 Success Rate: {success_rate:.1f}%"
+        ]
+        if summary['errors']:
+            lines.append(f"\n🚨 Errors ({len(summary['errors'])}):")
+            lines.extend(f"   • {error}" for error in summary['errors'])
+        lines.append(f"\n📁 Artifacts saved to: {ARTIFACTS_DIR}")
+        lines.append("=" * 60)
+        print("\n".join(lines))
 
 async def main():
     """Main test runner"""
@@ -152,6 +152,47 @@ export const apiClient = {
         },
       ),
 
+    // Stream a twist as Server-Sent Events, calling onDelta with each piece
+    // of text as it is generated. Resolves with the saved turn.
+    streamTwist: async (
+      storyId: string,
+      onDelta: (delta: string) => void,
+    ): Promise<{ turn_number: number; content: string }> => {
+      const response = await fetch(
+        `${API_BASE_URL}/api/v1/stories/twist/stream`,
+        {
+          method: "POST",
+          headers: { ...getEventHeaders(), Accept: "text/event-stream" },
+          body: JSON.stringify({ story_id: storyId }),
+        },
+      );
+      if (!response.ok || !response.body) {
+        throw new Error(`HTTP ${response.status}: ${response.statusText}`);
+      }
+
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const frames = buffer.split("\n\n");
+        buffer = frames.pop() || "";
+        for (const frame of frames) {
+          const lines = frame.split("\n");
+          const data = lines
+            .filter((line) => line.startsWith("data: "))
+            .map((line) => line.slice(6))
+            .join("\n");
+          if (!data) continue;
+          if (lines.includes("event: done")) return JSON.parse(data);
+          onDelta(JSON.parse(data).delta);
+        }
+      }
+      throw new Error("Twist stream ended before the twist was saved");
+    },
+
     getStatus: (storyId: string) =>
       apiRequest<{
         id: string;
@@ -243,6 +284,46 @@ export const apiClient = {
       });
     },
 
+    // Server-Sent Events stream announcing changes to a session. EventSource
+    // can't send the admin header, so the stream is read with fetch instead.
+    streamLiveView: async (
+      sessionId: string,
+      onEvent: (event: any) => void,
+      signal: AbortSignal,
+    ) => {
+      const token = localStorage.getItem("adminToken");
+      if (!token) throw new Error("Admin token not found");
+      const response = await fetch(
+        `${API_BASE_URL}/api/v1/admin/live/${sessionId}/stream`,
+        {
+          headers: { "X-Admin-Token": token, Accept: "text/event-stream" },
+          signal,
+        },
+      );
+      if (!response.ok || !response.body) {
+        throw new Error(`HTTP ${response.status}: ${response.statusText}`);
+      }
+
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const frames = buffer.split("\n\n");
+        buffer = frames.pop() || "";
+        for (const frame of frames) {
+          const data = frame
+            .split("\n")
+            .filter((line) => line.startsWith("data: "))
+            .map((line) => line.slice(6))
+            .join("\n");
+          if (data) onEvent(JSON.parse(data));
+        }
+      }
+    },
+
     getAnalysisList: () => {
       const token = localStorage.getItem("adminToken");
       if (!token) throw new Error("Admin token not found");
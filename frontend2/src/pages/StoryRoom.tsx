@@ -327,9 +327,29 @@ export default function StoryRoom() {
     if (!teamId || isLoading || !currentStory) return;
 
     setIsLoading(true);
+
+    // Show the twist as it streams in; loadStory() replaces it with the saved turn
+    const streamingTwist: StoryMessage = {
+      id: `twist-${Date.now()}`,
+      text: "",
+      author: "StoryTwister",
+      timestamp: new Date().toISOString(),
+      type: "twist",
+      sender: "twist",
+    };
+    setMessages((prev) => [...prev, streamingTwist]);
+
     try {
-      // Use the proper backend API with story ID
-      const result = await apiClient.stories.addTwist(currentStory.id);
+      await apiClient.stories.streamTwist(currentStory.id, (delta) => {
+        setMessages((prev) =>
+          prev.map((msg) =>
+            msg.id === streamingTwist.id
+              ? { ...msg, text: msg.text + delta }
+              : msg,
+          ),
+        );
+        scrollToBottom();
+      });
 
       addSystemMessage("🌪️ AI twist added to the story!", "success");
       // Refresh immediately after adding twist
@@ -338,6 +358,9 @@ export default function StoryRoom() {
       setTimeout(scrollToBottom, 100);
     } catch (error) {
       console.error("Failed to inject twist:", error);
+      setMessages((prev) =>
+        prev.filter((msg) => msg.id !== streamingTwist.id),
+      );
       addSystemMessage("❌ Failed to inject twist. Please try again.", "error");
     } finally {
       setIsLoading(false);
@@ -76,9 +76,28 @@ export default function AdminLiveView() {
     if (sessionId) {
       loadSessionData();
 
-      // Auto-refresh every 5 seconds for real-time updates
-      const interval = setInterval(loadSessionData, 5000);
-      return () => clearInterval(interval);
+      // Refresh when the server pushes a change; fall back to polling every
+      // 5 seconds if live updates aren't available. A slow refresh keeps the
+      // timer current while streaming.
+      let interval = setInterval(loadSessionData, 30000);
+      const controller = new AbortController();
+      apiClient.admin
+        .streamLiveView(sessionId, () => loadSessionData(), controller.signal)
+        .catch((error) => {
+          if (!controller.signal.aborted) {
+            console.warn("Live updates unavailable, polling instead:", error);
+          }
+        })
+        .finally(() => {
+          if (controller.signal.aborted) return;
+          clearInterval(interval);
+          interval = setInterval(loadSessionData, 5000);
+        });
+
+      return () => {
+        controller.abort();
+        clearInterval(interval);
+      };
     }
   }, [sessionId, toast]);
 
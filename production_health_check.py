@@ -5,9 +5,12 @@ Comprehensive validation of all production functionality
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
 import time
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import os
 
@@ -21,6 +24,13 @@ class HealthChecker:
         self.passed = 0
         self.failed = 0
         self.results = []
+        # One keep-alive session so every probe reuses the same TLS connection
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=8,
+            max_retries=Retry(total=2, backoff_factor=0.2)
+        ))
         
     def log(self, message, level="INFO"):
         """Log messages with timestamp"""
@@ -57,21 +67,29 @@ class HealthChecker:
             "/leaderboard"
         ]
         
-        for page in pages:
+        def fetch(page):
             try:
-                response = requests.get(f"{PROD_URL}{page}", timeout=TIMEOUT)
-                if response.status_code != 200:
-                    self.log(f"❌ Page {page} returned {response.status_code}", "ERROR")
-                    return False
-                    
-                # Check for basic content indicators
-                content = response.text.lower()
-                if "story-twister" not in content and "storytelling" not in content:
-                    self.log(f"❌ Page {page} missing expected content", "ERROR")
-                    return False
-                    
+                return self.session.get(f"{PROD_URL}{page}", timeout=TIMEOUT)
             except Exception as e:
-                self.log(f"❌ Page {page} failed: {str(e)}", "ERROR")
+                return e
+        
+        # The pages are independent, so fetch them concurrently over the shared session
+        with ThreadPoolExecutor(max_workers=len(pages)) as executor:
+            responses = list(executor.map(fetch, pages))
+        
+        for page, response in zip(pages, responses):
+            if isinstance(response, Exception):
+                self.log(f"❌ Page {page} failed: {str(response)}", "ERROR")
+                return False
+            
+            if response.status_code != 200:
+                self.log(f"❌ Page {page} returned {response.status_code}", "ERROR")
+                return False
+                
+            # Check for basic content indicators
+            content = response.text.lower()
+            if "story-twister" not in content and "storytelling" not in content:
+                self.log(f"❌ Page {page} missing expected content", "ERROR")
                 return False
                 
         return True
@@ -79,7 +97,7 @@ class HealthChecker:
     def test_backend_health(self):
         """Test backend health endpoint"""
         try:
-            response = requests.get(f"{API_URL}/health", timeout=TIMEOUT)
+            response = self.session.get(f"{API_URL}/health", timeout=TIMEOUT)
             return response.status_code == 200
         except:
             return False
@@ -87,7 +105,7 @@ class HealthChecker:
     def test_cors_headers(self):
         """Test CORS configuration"""
         try:
-            response = requests.options(f"{API_URL}/health", 
+            response = self.session.options(f"{API_URL}/health", 
                 headers={"Origin": PROD_URL}, timeout=TIMEOUT)
             cors_headers = response.headers.get("Access-Control-Allow-Origin")
             return cors_headers is not None
@@ -98,7 +116,7 @@ class HealthChecker:
         """Test session creation endpoint (without auth)"""
         try:
             # Test that the endpoint exists and responds appropriately
-            response = requests.post(f"{API_URL}/sessions", 
+            response = self.session.post(f"{API_URL}/sessions", 
                 json={"team_code": "HEALTH_CHECK"}, timeout=TIMEOUT)
             # Should return 401/403 for unauthorized, not 404
             return response.status_code in [401, 403, 422]
@@ -108,7 +126,7 @@ class HealthChecker:
     def test_stories_endpoint(self):
         """Test stories endpoint accessibility"""
         try:
-            response = requests.get(f"{API_URL}/stories", timeout=TIMEOUT)
+            response = self.session.get(f"{API_URL}/stories", timeout=TIMEOUT)
             # Should return 401/403 for unauthorized, not 404
             return response.status_code in [401, 403, 422]
         except:
@@ -123,7 +141,9 @@ class HealthChecker:
         
         for endpoint in endpoints:
             try:
-                response = requests.get(f"{API_URL}{endpoint}", timeout=TIMEOUT)
+                # Only the status matters; an existing route answers HEAD with 405
+                # (GET-only) or an auth error, while a missing one is still 404
+                response = self.session.head(f"{API_URL}{endpoint}", timeout=TIMEOUT, allow_redirects=True)
                 if response.status_code == 404:
                     return False
             except:
@@ -133,7 +153,7 @@ class HealthChecker:
     def test_database_connectivity(self):
         """Test database connectivity through health endpoint"""
         try:
-            response = requests.get(f"{API_URL}/health", timeout=TIMEOUT)
+            response = self.session.get(f"{API_URL}/health", timeout=TIMEOUT)
             if response.status_code == 200:
                 data = response.json()
                 return data.get("status") == "healthy"
@@ -156,6 +176,7 @@ class HealthChecker:
         self.test("Session Creation Endpoint", self.test_session_creation)
         self.test("Stories Endpoint", self.test_stories_endpoint)
         self.test("Admin Endpoints", self.test_admin_endpoints_exist)
+        self.session.close()
         
         # Results summary
         self.log("=" * 50)
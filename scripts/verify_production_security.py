@@ -4,56 +4,99 @@ Production Security Verification Script for Story-Twister
 Checks that all security requirements are met before deployment
 """
 
+import copy
 import os
 import re
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+# Environment variables the checks read, with descriptions for the required ones
+REQUIRED_ENV_VARS = {
+    'DATABASE_URL': 'Database connection string',
+    'ADMIN_SEED_PASSWORD': 'Admin password',
+    'ADMIN_SEED_API_TOKEN': 'Admin API token',
+    'GROQ_API_KEY': 'AI service API key',
+    'NODE_ENV': 'Node environment',
+    'VITE_NODE_ENV': 'Vite environment'
+}
+OPTIONAL_ENV_KEYS = frozenset({'ALLOWED_ORIGINS', 'VITE_API_BASE_URL'})
+
+# Known weak/default credentials and URL patterns
+WEAK_PASSWORDS = frozenset({'password', 'admin', 'ChangeMe123!'})
+WEAK_API_TOKENS = frozenset({'dev-admin-token', 'admin-token'})
+WEAK_DB_CREDENTIALS_RE = re.compile(r'password|admin', re.IGNORECASE)
+
+# Validation rules for set environment variables: (var, value) -> (level, message)
+def _check_set(var, value):
+    return 'passed', f"✅ {var} is set"
+
+def _check_password(var, value):
+    if len(value) < 16:
+        return 'error', f"❌ {var} is too short (minimum 16 characters)"
+    if value in WEAK_PASSWORDS:
+        return 'error', f"❌ {var} uses weak/default password"
+    return 'passed', f"✅ {var} is set with strong password"
+
+def _check_token(var, value):
+    if len(value) < 32:
+        return 'error', f"❌ {var} is too short (minimum 32 characters)"
+    if value in WEAK_API_TOKENS:
+        return 'error', f"❌ {var} uses weak/default token"
+    return 'passed', f"✅ {var} is set with secure token"
+
+def _check_prod_env(var, value):
+    if value != 'production':
+        return 'warning', f"⚠️  {var} is not set to 'production' (current: {value})"
+    return 'passed', f"✅ {var} is set to production"
+
+_RULES = {
+    'ADMIN_SEED_PASSWORD': _check_password,
+    'ADMIN_SEED_API_TOKEN': _check_token,
+    'NODE_ENV': _check_prod_env,
+    'VITE_NODE_ENV': _check_prod_env
+}
+
+# Patterns .gitignore must contain, and a single matcher for all of them
+GITIGNORE_REQUIRED_PATTERNS = (
+    '.env',
+    '*.log',
+    'node_modules/',
+    '*.key',
+    '*.pem'
+)
+GITIGNORE_PATTERNS_RE = re.compile('(?=(' + '|'.join(map(re.escape, GITIGNORE_REQUIRED_PATTERNS)) + '))')
+
+# Files that must never be tracked by git, queried in a single `git ls-files` call
+SENSITIVE_TRACKED_PATHS = ('.env', '*.key', '*.pem')
+
+# The production check that hides development credentials in AdminLogin.tsx
+PRODUCTION_GUARD_RE = re.compile(r"import\.meta\.env\.VITE_NODE_ENV\s*!==\s*['\"]production['\"]")
+
 class SecurityChecker:
     def __init__(self):
         self.project_root = Path(__file__).parent.parent
         self.errors = []
         self.warnings = []
         self.passed = []
+        # Every check evaluates the same snapshot of the environment
+        self.env = {key: os.environ.get(key) for key in REQUIRED_ENV_VARS.keys() | OPTIONAL_ENV_KEYS}
+        self._git_tracked_sensitive = None
 
     def check_environment_variables(self):
         """Check that all required environment variables are set with secure values"""
         print("🔐 Checking Environment Variables...")
         
-        required_vars = {
-            'DATABASE_URL': 'Database connection string',
-            'ADMIN_SEED_PASSWORD': 'Admin password',
-            'ADMIN_SEED_API_TOKEN': 'Admin API token',
-            'GROQ_API_KEY': 'AI service API key',
-            'NODE_ENV': 'Node environment',
-            'VITE_NODE_ENV': 'Vite environment'
-        }
-        
-        for var, description in required_vars.items():
-            value = os.getenv(var)
+        for var, description in REQUIRED_ENV_VARS.items():
+            value = self.env.get(var)
             if not value:
-                self.errors.append(f"❌ {var} is not set ({description})")
-            elif var == 'ADMIN_SEED_PASSWORD':
-                if len(value) < 16:
-                    self.errors.append(f"❌ {var} is too short (minimum 16 characters)")
-                elif value in ['password', 'admin', 'ChangeMe123!']:
-                    self.errors.append(f"❌ {var} uses weak/default password")
-                else:
-                    self.passed.append(f"✅ {var} is set with strong password")
-            elif var == 'ADMIN_SEED_API_TOKEN':
-                if len(value) < 32:
-                    self.errors.append(f"❌ {var} is too short (minimum 32 characters)")
-                elif value in ['dev-admin-token', 'admin-token']:
-                    self.errors.append(f"❌ {var} uses weak/default token")
-                else:
-                    self.passed.append(f"✅ {var} is set with secure token")
-            elif var in ['NODE_ENV', 'VITE_NODE_ENV']:
-                if value != 'production':
-                    self.warnings.append(f"⚠️  {var} is not set to 'production' (current: {value})")
-                else:
-                    self.passed.append(f"✅ {var} is set to production")
+                self._record('error', f"❌ {var} is not set ({description})")
             else:
-                self.passed.append(f"✅ {var} is set")
+                self._record(*_RULES.get(var, _check_set)(var, value))
+
+    def _record(self, level, message):
+        """Append a finding to the list for its level"""
+        {'error': self.errors, 'warning': self.warnings, 'passed': self.passed}[level].append(message)
 
     def check_gitignore(self):
         """Check that .gitignore properly excludes sensitive files"""
@@ -64,52 +107,61 @@ class SecurityChecker:
             self.errors.append("❌ .gitignore file is missing")
             return
         
+        # Stream line by line (no pattern spans a newline) and stop once every
+        # required pattern is found; the lookahead lets matches overlap
+        found = set()
         with open(gitignore_path, 'r') as f:
-            gitignore_content = f.read()
-        
-        required_patterns = [
-            '.env',
-            '*.log',
-            'node_modules/',
-            '*.key',
-            '*.pem'
-        ]
+            for line in f:
+                found.update(match.group(1) for match in GITIGNORE_PATTERNS_RE.finditer(line))
+                if len(found) == len(GITIGNORE_REQUIRED_PATTERNS):
+                    break
         
-        for pattern in required_patterns:
-            if pattern not in gitignore_content:
+        for pattern in GITIGNORE_REQUIRED_PATTERNS:
+            if pattern not in found:
                 self.errors.append(f"❌ .gitignore missing pattern: {pattern}")
             else:
                 self.passed.append(f"✅ .gitignore includes: {pattern}")
 
     def check_env_file_not_committed(self):
-        """Check that .env file is not committed to git"""
+        """Check that .env and key files are not committed to git"""
         print("🔍 Checking .env file status...")
         
+        tracked = self.tracked_sensitive_files()
+        if tracked is None:
+            self.warnings.append("⚠️  Could not check git status of sensitive files")
+        elif tracked:
+            for path in sorted(tracked):
+                self.errors.append(f"❌ {path} is committed to git (SECURITY RISK)")
+        
         env_path = self.project_root / '.env'
-        if env_path.exists():
-            # Check if .env is tracked by git
+        if not env_path.exists():
+            self.warnings.append("⚠️  .env file not found (may be set via environment)")
+        elif tracked is not None and '.env' not in tracked:
+            self.passed.append("✅ .env file is not committed to git")
+
+    def tracked_sensitive_files(self):
+        """Sensitive files tracked by git (None if git could not be queried), memoized"""
+        if self._git_tracked_sensitive is None:
             import subprocess
             try:
                 result = subprocess.run(
-                    ['git', 'ls-files', '.env'],
+                    ['git', 'ls-files', '--', *SENSITIVE_TRACKED_PATHS],
                     cwd=self.project_root,
                     capture_output=True,
                     text=True
                 )
-                if result.stdout.strip():
-                    self.errors.append("❌ .env file is committed to git (SECURITY RISK)")
-                else:
-                    self.passed.append("✅ .env file is not committed to git")
-            except subprocess.SubprocessError:
-                self.warnings.append("⚠️  Could not check git status of .env file")
-        else:
-            self.warnings.append("⚠️  .env file not found (may be set via environment)")
+            except (OSError, subprocess.SubprocessError):
+                return None
+            if result.returncode != 0:
+                return None
+            self._git_tracked_sensitive = set(result.stdout.splitlines())
+        return self._git_tracked_sensitive
 
     def check_cors_configuration(self):
         """Check CORS configuration for production"""
         print("🌐 Checking CORS Configuration...")
         
-        allowed_origins = os.getenv('ALLOWED_ORIGINS', '')
+        allowed_origins = self.env.get('ALLOWED_ORIGINS') or ''
         if not allowed_origins:
             self.warnings.append("⚠️  ALLOWED_ORIGINS not set")
             return
@@ -126,15 +178,15 @@ class SecurityChecker:
         """Check database URL for security issues"""
         print("🗄️  Checking Database Configuration...")
         
-        db_url = os.getenv('DATABASE_URL', '')
+        db_url = self.env.get('DATABASE_URL') or ''
         if not db_url:
             self.errors.append("❌ DATABASE_URL is not set")
             return
         
-        if 'localhost' in db_url and os.getenv('NODE_ENV') == 'production':
+        if 'localhost' in db_url and self.env.get('NODE_ENV') == 'production':
             self.warnings.append("⚠️  DATABASE_URL uses localhost in production")
         
-        if 'password' in db_url.lower() or 'admin' in db_url.lower():
+        if WEAK_DB_CREDENTIALS_RE.search(db_url):
             self.warnings.append("⚠️  DATABASE_URL may contain weak credentials")
         
         if db_url.startswith('postgresql://'):
@@ -149,10 +201,13 @@ class SecurityChecker:
         # Check if development UI is properly hidden
         admin_login_path = self.project_root / 'frontend2' / 'src' / 'pages' / 'admin' / 'AdminLogin.tsx'
         if admin_login_path.exists():
-            with open(admin_login_path, 'r') as f:
-                content = f.read()
+            # Scan line by line and stop at the first production guard
+            guarded = False
+            if admin_login_path.stat().st_size > 0:
+                with open(admin_login_path, 'r') as f:
+                    guarded = any(PRODUCTION_GUARD_RE.search(line) for line in f)
             
-            if 'import.meta.env.VITE_NODE_ENV !== \'production\'' in content:
+            if guarded:
                 self.passed.append("✅ Development credentials are hidden in production")
             else:
                 self.warnings.append("⚠️  Development credentials may be visible in production")
@@ -161,26 +216,44 @@ class SecurityChecker:
         """Check SSL/HTTPS readiness"""
         print("🔒 Checking SSL/HTTPS Readiness...")
         
-        api_base_url = os.getenv('VITE_API_BASE_URL', '')
+        api_base_url = self.env.get('VITE_API_BASE_URL') or ''
         if api_base_url.startswith('https://'):
             self.passed.append("✅ API base URL uses HTTPS")
-        elif api_base_url.startswith('http://') and os.getenv('NODE_ENV') == 'production':
+        elif api_base_url.startswith('http://') and self.env.get('NODE_ENV') == 'production':
             self.warnings.append("⚠️  API base URL uses HTTP in production (consider HTTPS)")
         else:
             self.warnings.append("⚠️  VITE_API_BASE_URL not set or invalid")
 
+    def _run_isolated(self, check):
+        """Run one check on a copy of this checker with its own result lists"""
+        worker = copy.copy(self)
+        worker.errors, worker.warnings, worker.passed = [], [], []
+        check(worker)
+        return worker
+
     def run_all_checks(self):
         """Run all security checks"""
         print("🛡️  STORY-TWISTER PRODUCTION SECURITY VERIFICATION")
         print("=" * 60)
         
-        self.check_environment_variables()
-        self.check_gitignore()
-        self.check_env_file_not_committed()
-        self.check_cors_configuration()
-        self.check_database_url_security()
-        self.check_frontend_production_config()
-        self.check_ssl_readiness()
+        checks = [
+            SecurityChecker.check_environment_variables,
+            SecurityChecker.check_gitignore,
+            SecurityChecker.check_env_file_not_committed,
+            SecurityChecker.check_cors_configuration,
+            SecurityChecker.check_database_url_security,
+            SecurityChecker.check_frontend_production_config,
+            SecurityChecker.check_ssl_readiness
+        ]
+        
+        # The checks are independent (git subprocess, file reads), so run them
+        # concurrently and merge their findings back in the original order
+        with ThreadPoolExecutor(max_workers=len(checks)) as executor:
+            workers = list(executor.map(self._run_isolated, checks))
+        for worker in workers:
+            self.errors.extend(worker.errors)
+            self.warnings.extend(worker.warnings)
+            self.passed.extend(worker.passed)
         
         print("\n" + "=" * 60)
         print("📊 SECURITY CHECK RESULTS")